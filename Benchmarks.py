@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+from core.Timer import *
+import Main
+import sys, io, json, math, random, tracemalloc, contextlib, argparse, platform, subprocess, multiprocessing
+
+
+# Modules which one-shot punch commands should not import
+slowModules = ["json", "shutil", "calendar", "socketserver", "inspect", "cProfile"]
+
+
+def generateTimestamps(count: int) -> list:
+    """Generating a bunch of timestamps with random intervals
+
+    Args:
+        count (int): Timestamp count
+
+    Returns:
+        list: List of created timestamps
+    """
+    timestamps = []
+    timestamp = round(time.time())
+    for i in range(count, 0, -1):
+        timestamp -= random.randrange(1, 3_600)
+        timestamps.append({
+            "id": i,
+            "type": "start" if i % 2 == 1 else "stop",
+            "timestamp": timestamp
+        })
+    timestamps.reverse()
+    return timestamps
+
+
+#########################################################################################
+
+
+def measure(function, minTime: float = 0.2, maxRuns: int = 1000) -> float:
+    """Measures average duration of a function (after one warm-up run)
+
+    Args:
+        function (callable): Function to measure
+        minTime (float, optional): Minimal total time of all runs. Defaults to 0.2.
+        maxRuns (int, optional): Maximal number of runs. Defaults to 1000.
+
+    Returns:
+        float: Average duration in seconds
+    """
+    function()
+    runs = 0
+    total = 0.0
+    while total < minTime and runs < maxRuns:
+        start = time.perf_counter()
+        function()
+        total += time.perf_counter() - start
+        runs += 1
+    return total / runs
+
+
+def measureMemory(function) -> int:
+    """Measures peak memory allocated by a function
+
+    Args:
+        function (callable): Function to measure
+
+    Returns:
+        int: Peak memory in bytes
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def growthExponent(sizes: list, durations: list) -> float:
+    """Estimates growth exponent k of duration ~ size^k (least squares fit in log-log scale)
+
+    Args:
+        sizes (list): Sizes of inputs
+        durations (list): Measured durations
+
+    Returns:
+        float: Growth exponent or None if there are not enough measurements
+    """
+    points = [(math.log(size), math.log(duration)) for size, duration in zip(sizes, durations) if duration > 0]
+    if len(points) < 2:
+        return None
+    meanX = sum(x for x, y in points) / len(points)
+    meanY = sum(y for x, y in points) / len(points)
+    variance = sum((x - meanX) ** 2 for x, y in points)
+    if variance == 0:
+        return None
+    return sum((x - meanX) * (y - meanY) for x, y in points) / variance
+
+
+def measureImports(command: str) -> dict:
+    """Measures time spent importing modules by a one-shot command (python -X importtime)
+    Modules imported by the interpreter itself are not included.
+
+    Args:
+        command (str): Command to run
+
+    Returns:
+        dict: Cumulative import time of each imported module in seconds
+    """
+    def importTimes(code: str) -> dict:
+        output = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stderr
+        times = {}
+        for line in output.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[1].strip().isdigit():
+                times[parts[2][1:].rstrip()] = int(parts[1]) / 1_000_000
+        return times
+
+    interpreter = set(name.strip() for name in importTimes("pass"))
+    code = "from core.Timer import Timer; Timer().folderName = %r; import Main; Main.main(['Main.py', %r])" % (Timer().folderName, command)
+    return {name: seconds for name, seconds in importTimes(code).items() if name.strip() not in interpreter}
+
+
+#########################################################################################
+
+
+def printQuietly(data: list, result: dict):
+    """Prints a table into memory instead of the console
+
+    Args:
+        data (list): List of objects
+        result (dict): Object with result data
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        Main.printTable(data, result)
+
+
+def createBenchmarks(timestamps: list) -> dict:
+    """Creates benchmarked functions for a history of timestamps
+
+    Args:
+        timestamps (list): List of timestamps
+
+    Returns:
+        dict: Benchmark names and functions
+    """
+    Timer().saveTimestamps(timestamps)
+    Timer().loadDays()
+    epochs = Timer().loadEpochs()
+    days = Timer().calculateDays(epochs)
+
+    def load():
+        Timer().snapshotKey = None
+        Timer().loadTimestamps()
+
+    def loadCompact():
+        Timer().snapshotKey = None
+        Timer().loadEpochs()
+
+    def loadTail():
+        Timer().snapshotKey = None
+        Timer().loadTail(count=12)
+        Timer().loadTail(firstDate=datetime.date.today())
+
+    def rollup():
+        Timer().snapshotKey = None
+        Timer().rebuildRollup()
+
+    def report(*commands):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for command in commands:
+                Main.execute(command)
+
+    def punch():
+        if not Timer().startTimestamp():
+            Timer().stopTimestamp()
+
+    return {
+        "loadTimestamps": load,
+        "loadEpochs": loadCompact,
+        "loadTail": loadTail,
+        "saveTimestamps": lambda: Timer().saveTimestamps(timestamps),
+        "startTimestamp": punch,
+        "calculateTerms": lambda: Timer().calculateTerms(epochs),
+        "calculateDays": lambda: Timer().calculateDays(epochs),
+        "calculateWeeks": lambda: Timer().calculateWeeks(epochs),
+        "calculateMonths": lambda: Timer().calculateMonths(epochs),
+        "calculateYears": lambda: Timer().calculateYears(epochs),
+        "calculateToday": lambda: Timer().calculateToday(epochs),
+        "rebuildRollup": rollup,
+        "printTable": lambda: printQuietly(*days),
+        "daysReport": lambda: report("days"),
+        "allReports": lambda: report("days", "weeks", "months", "years", "today"),
+    }
+
+
+def run(sizes: list, names: list = None, storages: list = ["journal"]) -> dict:
+    """Runs all benchmarks for each history size and storage
+
+    Args:
+        sizes (list): Numbers of timestamps
+        names (list, optional): Names of benchmarks to run. Defaults to None (all).
+        storages (list, optional): Names of storages. Defaults to ["journal"].
+
+    Returns:
+        dict: Results (benchmarks of other storages than journal are prefixed with storage name)
+    """
+    results = {}
+    for size in sizes:
+        random.seed(size)
+        timestamps = generateTimestamps(size)
+        for storage in storages:
+            Timer().storage = storage
+            for name, function in createBenchmarks(timestamps).items():
+                if names is not None and name not in names:
+                    continue
+                duration = measure(function, maxRuns=1000 if size < 100_000 else 3)
+                memory = measureMemory(function)
+                if storage != Timer().defaultStorage:
+                    name = storage + "." + name
+                results.setdefault(name, {})[str(size)] = {
+                    "seconds": duration,
+                    "opsPerSecond": 1 / duration if duration > 0 else None,
+                    "peakMemory": memory
+                }
+                Main.prints(name.ljust(28) + str(size).rjust(10) + format(duration * 1000, ".3f").rjust(14) + " ms" + format(memory / 1024, ".1f").rjust(14) + " KiB")
+            Timer().deleteFile()
+            Timer().storage = None
+    exponents = {}
+    for name, measurements in results.items():
+        exponents[name] = growthExponent([int(size) for size in measurements], [measurement["seconds"] for measurement in measurements.values()])
+    return {"python": platform.python_version(), "created": int(time.time()), "results": results, "exponents": exponents}
+
+
+def runImports(commands: list, budget: float) -> dict:
+    """Measures import time of one-shot commands and checks it against a budget
+
+    Args:
+        commands (list): Commands to measure
+        budget (float): Maximal import time in seconds
+
+    Returns:
+        dict: Results
+    """
+    results = {}
+    for command in commands:
+        # Warm-up run creates the folder and compiled modules
+        measureImports(command)
+        times = [measureImports(command) for i in range(5)]
+        # Nested imports are already included in cumulative time of top-level imports
+        total = min(sum(seconds for name, seconds in imports.items() if not name.startswith(" ")) for imports in times)
+        modules = sorted(name.strip() for name in times[0])
+        slow = [name for name in modules if name.split(".")[0] in slowModules]
+        results[command] = {"seconds": total, "modules": modules, "slowModules": slow, "withinBudget": total <= budget and not slow}
+        Main.prints(("import " + command).ljust(28) + format(total * 1000, ".3f").rjust(24) + " ms" + ("" if results[command]["withinBudget"] else "  over budget " + " ".join(slow)))
+    Timer().deleteFolder()
+    return results
+
+
+def punchRepeatedly(folderName: str, count: int, queue):
+    """Adds alternating timestamps and reports how many were added
+
+    Args:
+        folderName (str): Folder for timestamps (processes may not inherit it)
+        count (int): Number of attempts
+        queue (multiprocessing.Queue): Queue for number of added timestamps
+    """
+    Timer().folderName = folderName
+    added = 0
+    for i in range(count):
+        if Timer().startTimestamp() or Timer().stopTimestamp():
+            added += 1
+    queue.put(added)
+
+
+def runConcurrency(processCount: int, punches: int) -> dict:
+    """Punches from multiple processes at once and checks that no timestamps were lost
+
+    Args:
+        processCount (int): Number of processes
+        punches (int): Number of punch attempts of each process
+
+    Returns:
+        dict: Results
+    """
+    Timer().deleteFile()
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=punchRepeatedly, args=(Timer().folderName, punches, queue)) for i in range(processCount)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    added = sum(queue.get() for process in processes)
+    for process in processes:
+        process.join()
+    duration = time.perf_counter() - start
+    timestamps = Timer().loadTimestamps()
+    lost = added - len(timestamps)
+    valid = [timestamp["id"] for timestamp in timestamps] == list(range(1, len(timestamps) + 1)) and all(timestamp["type"] == ("start", "stop")[i % 2] for i, timestamp in enumerate(timestamps))
+    Timer().deleteFile()
+    Main.prints("concurrentPunches".ljust(28) + str(added).rjust(10) + format(added / duration, ".1f").rjust(14) + " punches/s" + ("" if lost == 0 and valid else "  lost " + str(lost) + " punches"))
+    return {"processes": processCount, "punches": added, "seconds": duration, "punchesPerSecond": added / duration, "lost": lost, "valid": valid}
+
+
+def compare(current: dict, baseline: dict):
+    """Prints ratios of durations between current and baseline results
+
+    Args:
+        current (dict): Current results
+        baseline (dict): Baseline results
+    """
+    rows = []
+    for name, measurements in current["results"].items():
+        for size, measurement in measurements.items():
+            if name in baseline["results"] and size in baseline["results"][name]:
+                before = baseline["results"][name][size]["seconds"]
+                rows.append({"benchmark": name, "size": size, "before": format(before * 1000, ".3f"), "after": format(measurement["seconds"] * 1000, ".3f"), "ratio": format(measurement["seconds"] / before, ".2f")})
+    Main.printTable(rows)
+
+
+#########################################################################################
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measures performance of storage and calculation methods")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000], help="numbers of timestamps")
+    parser.add_argument("--only", nargs="+", help="names of benchmarks to run")
+    parser.add_argument("--output", help="file for JSON results")
+    parser.add_argument("--compare", help="file with JSON results to compare with")
+    parser.add_argument("--storages", nargs="+", default=["journal"], choices=["json", "journal", "sqlite", "binary"], help="storages of timestamps to compare")
+    parser.add_argument("--processes", type=int, default=8, help="number of processes punching at once")
+    parser.add_argument("--punches", type=int, default=100, help="number of punch attempts of each process")
+    parser.add_argument("--import-budget", type=float, default=20.0, help="maximal import time of punch commands in milliseconds")
+    args = parser.parse_args()
+    Timer().folderName = "benchmarkfolder"
+    try:
+        results = run(args.sizes, args.only, args.storages)
+        if args.only is None or "concurrentPunches" in args.only:
+            print()
+            results["concurrency"] = runConcurrency(args.processes, args.punches)
+        if args.only is None or "imports" in args.only:
+            print()
+            results["imports"] = runImports(["status", "start", "stop"], args.import_budget / 1000)
+    finally:
+        Timer().deleteFolder()
+    print()
+    for name, exponent in results["exponents"].items():
+        if exponent is not None:
+            Main.prints(name.ljust(28) + "O(n^" + format(exponent, ".2f") + ")")
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+    if args.compare is not None:
+        print()
+        with open(args.compare, "r") as file:
+            compare(results, json.load(file))
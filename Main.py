@@ -1,287 +1,477 @@
 #!/usr/bin/env python3
-from core.Timer import *
-import sys, datetime, math
+from core.Timer import Timer
+from core.Profiler import Profiler
+import sys, time
 
 
 indent = "    "
-dateFormat = "%d.%m.%Y"
-timeFormat = "%H:%M:%S"
+profile = None
+limit = None
+offset = 0
 
 
-def datetimeFormat() -> str:
-    """Returns a combination of date and time formats
+def prints(text: str):
+    """Prints text with an indent
 
-    Returns:
-        str: Datetime format
+    Args:
+        text (str): Text to print
     """
-    return dateFormat + " " + timeFormat
-
-
-#########################################################################################
+    print(indent + text)
 
 
-def timeToReadableString(time: int) -> str:
-    """Converts timestamp to readable datetime string
+def printTable(data: list, result: dict = None, paged: bool = True):
+    """Prettyprints data in a table
+    Table renderer is only imported when some table is printed.
 
     Args:
-        time (int): Timestamp
-
-    Returns:
-        str: Timestamp converted to readable datetime
+        data (list): List of objects
+        result (dict): Object with result data
+        paged (bool, optional): Apply options --limit and --offset? Defaults to True.
     """
-    return datetime.datetime.fromtimestamp(time).strftime(datetimeFormat())
+    from core import Table
+    with Profiler().measure("format"):
+        if paged:
+            Table.printTable(data, result, limit, offset)
+        else:
+            Table.printTable(data, result)
 
 
-def dateToReadableString(date: datetime.date) -> str:
-    """Converts date to readable date string
+#########################################################################################
 
-    Args:
-        date (int): Date
 
-    Returns:
-        str: Date converted to readable date
+def help():
+    """Prints out all usable commands
     """
-    return datetime.datetime.combine(date, datetime.time.min).strftime(dateFormat)
+    printTable([{"command": commands["command"], "description": commands["description"]} for commands in commandList])
 
 
-def deltaToReadableTime(delta: int) -> str:
-    """Converts delta time to readable format
+def stats(count: str = "10"):
+    """Summarizes statistics of last executed commands
 
     Args:
-        delta (int): Time delta
-
-    Returns:
-        str: Time delta converted to readable version
+        count (str, optional): Number of last runs. Defaults to "10".
     """
-    hours = delta // 3600
-    minutes = (delta % 3600) // 60
-    seconds = math.floor(delta % 60)
-    return str(int(hours)) + ":" + str(int(minutes)).rjust(2, "0") + ":" + str(int(seconds)).rjust(2, "0")
-
-
-#########################################################################################
+    if not count.isdigit():
+        prints("Number of runs has to be a positive integer.")
+        return
+    printTable(Profiler().summarizeRuns(Profiler().loadRuns(Timer().getStatsPath(), int(count))))
 
 
-def prints(text: str):
-    """Prints text with an indent
+def storage(backend: str = None, name: str = None):
+    """Shows selected storage or moves timestamps into another storage
 
     Args:
-        text (str): Text to print
+        backend (str, optional): Storage name. Defaults to None (only shows selected storage).
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    print(indent + text)
+    from core.Storage import backends
+    # Only timer name can be given ("storage NAME")
+    if name is None and backend is not None and backend not in backends and backend in Timer().getTimerNames():
+        name, backend = backend, None
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    if backend is None:
+        prints("Timestamps are stored in " + timer.getFilePath() + " (" + timer.getStorageName() + ").")
+    elif backend not in backends:
+        prints("Unknown storage, use one of: " + ", ".join(backends) + ".")
+    elif timer.migrateStorage(backend):
+        prints("Timestamps were moved to " + timer.getFilePath() + ".")
+    else:
+        prints("Timestamps are already stored in " + backend + " storage.")
 
 
-def processTableData(data: list) -> list:
-    """Processes data into a more readable version
+def compact(period: str = "year", name: str = None):
+    """Moves timestamps of closed periods into archived segments
 
     Args:
-        data (list): List of objects to be processed
-
-    Returns:
-        list: Processed data
+        period (str, optional): Period of segments ("year" or "month"). Defaults to "year".
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    if len(data) == 0:
+    # Only timer name can be given ("compact NAME")
+    if name is None and period not in ("year", "month") and period in Timer().getTimerNames():
+        name, period = period, "year"
+    if period not in ("year", "month"):
+        prints("Unknown period, use 'compact year' or 'compact month'.")
         return
-    # Altering row data
-    for row in data:
-        # Spcific fields
-        if "month" in row and row["month"] != "":
-            row["month"] = row["month"].strftime("%B %Y")
-        if "year" in row and row["year"] != "":
-            row["year"] = row["year"].strftime("%Y")
-        if "time" in row and row["time"] != "":
-            row["hours"] = round(row["time"] / 3600, 3)
-            if row["hours"] % 1 >= 0.75:
-                row["rounded"] = row["hours"] - row["hours"] % 1 + 1
-            elif row["hours"] % 1 >= 0.25:
-                row["rounded"] = row["hours"] - row["hours"] % 1 + 0.5
-            else:
-                row["rounded"] = row["hours"] - row["hours"] % 1
-            row["time"] = deltaToReadableTime(row["time"])
-            row["hours"] = format(row["hours"], ".3f")
-        # Common fields
-        for key in row.keys():
-            if type(row[key]) == datetime.date:
-                row[key] = dateToReadableString(row[key])
-            elif type(row[key]) == int and key != "id":
-                row[key] = timeToReadableString(row[key])
-    # Altering result data
-    if "id" in data[-1] and data[-1]["id"] == "TOTAL" and "rounded" in data[-1]:
-        data[-1]["rounded"] = sum(row["rounded"] for row in data[:-1])
-    return data
-
-
-def selectCorrectFieldJustification(type: str, value, length: int) -> str:
-    """Creates a new string with the correct justification based on field type
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    count = timer.compact(period)
+    if count > 0:
+        prints(str(count) + " timestamps were moved to " + timer.getArchivePath() + ".")
+    else:
+        prints("There are no timestamps of closed periods to archive.")
 
-    Args:
-        type (str): Field type (name)
-        value (mixed): Value
-        length (int): Desired length of string
 
-    Returns:
-        str: New, justifed string
+def serve():
+    """Serves commands over a Unix domain socket until interrupted
     """
-    if type in ("time", "hours", "rounded"):
-        value = value.rjust(length)
-    return value.ljust(length + 3)
-
+    from core.Server import Server
+    server = Server(Timer().getSocketPath(), execute)
+    if not server.isSupported():
+        prints("Unix domain sockets are not supported on this system.")
+        return
+    if not Timer().folderExists():
+        Timer().createFolder()
+    prints("Serving commands on " + Timer().getSocketPath() + ", press Ctrl+C to stop.")
+    if not server.serve():
+        prints("Server is already running.")
 
-def printTable(data: list, result: dict = None):
-    """Prettyprints data in a table
 
-    Args:
-        data (list): List of objects
-        result (dict): Object with result data
+def exit():
+    """Exits the application
     """
-    if len(data) == 0:
-        prints("No data found.")
-        return
-    if result is not None:
-        data += [result, ]
-    # Replacing certain data with a more readable version
-    processTableData(data)
-    # Getting headers
-    headers = list(data[0].keys())
-    # Getting max data lengths
-    lengths = [len(headers[i]) for i in range(len(headers))]
-    for row in data:
-        values = list(row.values())
-        for i in range(len(row)):
-            if len(str(values[i])) > lengths[i]:
-                lengths[i] = len(str(values[i]))
-    # Showing headers
-    output = ""
-    i = 0
-    for header in headers:
-        output += header.upper().ljust(lengths[i] + 3)
-        i+=1
-    prints(output)
-    # Printing divider
-    prints((sum(lengths) + (len(lengths) -1) * 3) * "-")
-    # Showing data
-    for row in data:
-        if "id" in row and type(row["id"]) is not int:
-            prints((sum(lengths) + (len(lengths) -1) * 3) * "-")
-        output = ""
-        i = 0
-        for key in list(row.keys()):
-            output += selectCorrectFieldJustification(key, str(row[key]), lengths[i])
-            i+=1
-        prints(output)
+    sys.exit()
 
 
-#########################################################################################
+def getTimer(name: str = None, create: bool = True) -> Timer:
+    """Returns timer of a name (the default timer without a name), prints a message when it can't be used
 
+    Args:
+        name (str, optional): Timer name. Defaults to None (default timer).
+        create (bool, optional): Can the timer be created? Defaults to True.
 
-def help():
-    """Prints out all usable commands
+    Returns:
+        Timer: Timer or None
     """
-    printTable(commandList)
+    if name is None:
+        return Timer()
+    if name == "all":
+        prints("Name 'all' can only be used for reports of all timers (days all, weeks all, months all, years all).")
+        return None
+    if name in Timer.reservedNames:
+        prints("Timer name '" + name + "' is reserved.")
+        return None
+    if not Timer.isValidName(name):
+        prints("Timer name '" + name + "' can't be used, use letters, digits, '-', '_' and '.'.")
+        return None
+    if not create and name not in Timer().getTimerNames():
+        prints("Timer '" + name + "' doesn't exist.")
+        return None
+    return Timer(name)
+
+
+def printSources(sources: list, names: list, report: str):
+    """Prints time spent by several timers or folders (one column for each of them)
 
+    Args:
+        sources (list): Day buckets of each source
+        names (list): Source names
+        report (str): "days", "weeks", "months" or "years"
+    """
+    from core import Table
+    data, result = Timer().summarizeSources(sources, names, report)
+    for row in data + [result]:
+        for name in names:
+            row["time " + name] = Table.deltaToReadableTime(row["time " + name])
+    printTable(data, result)
 
-def exit():
-    """Exits the application
+
+def printReport(name: str, report: str):
+    """Prints time spent for each day, week, month or year of a timer (or of all timers)
+
+    Args:
+        name (str): Timer name, "all" or None (default timer)
+        report (str): "days", "weeks", "months" or "years"
     """
-    sys.exit()
+    if name == "all":
+        names = ["default"] + Timer().getTimerNames()
+        printSources([Timer(None if i == 0 else timerName).loadDays() for i, timerName in enumerate(names)], names, report)
+        return
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    summarize = {"days": timer.summarizeDays, "weeks": timer.summarizeWeeks, "months": timer.summarizeMonths, "years": timer.summarizeYears}[report]
+    data, result = summarize(timer.loadDays())
+    printTable(data, result)
 
 
-def start():
+def start(name: str = None):
     """Adding new START timestamp to file
+
+    Args:
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    if Timer().startTimestamp():
+    timer = getTimer(name)
+    if timer is None:
+        return
+    if timer.startTimestamp():
         prints("New START timestamp added. Calculations will use current time as end of this term.")
     else:
         prints("New START timestamp could not be added. Make sure that timestamp types alternate.")
 
 
-def stop():
+def stop(name: str = None):
     """Adding new STOP timestamp to file
+
+    Args:
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    if Timer().stopTimestamp():
+    # Only started timers can be stopped, so a mistyped name doesn't create a timer
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    if timer.stopTimestamp():
         prints("New STOP timestamp added.")
     else:
         prints("New STOP timestamp could not be added. Make sure that timestamp types alternate.")
 
 
-def show():
-    """Prints out list of timestamps
+def show(option: str = None, value: str = None, name: str = None):
+    """Prints out list of timestamps (all of them, last N of them or since a date)
+
+    Args:
+        option (str, optional): Option "--last" or "--since". Defaults to None (all timestamps).
+        value (str, optional): Number of timestamps or first date. Defaults to None.
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    printTable(Timer().loadTimestamps())
+    # Only timer name can be given ("show NAME")
+    if option is not None and not option.startswith("--") and value is None and name is None:
+        option, name = None, option
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    if option is None:
+        # Timestamps are created lazily, only those within --limit and --offset are formatted
+        printTable(timer.iterateTimestamps(timer.loadEpochs()))
+        return
+    if option == "--last" and value is not None and value.isdigit():
+        offset, epochs = timer.loadTail(count=int(value))
+    elif option == "--since" and value is not None:
+        from core import Table
+        import datetime
+        firstDate = Table.readableStringToDate(value)
+        if firstDate is None:
+            prints("Dates have to be in the " + datetime.date.today().strftime(Table.dateFormat) + " format.")
+            return
+        offset, epochs = timer.loadTail(firstDate=firstDate)
+    else:
+        prints("Use 'show [NAME]', 'show --last N [NAME]' or 'show --since DATE [NAME]'.")
+        return
+    printTable(timer.fromEpochs(epochs, offset))
 
 
-def terms():
+def terms(name: str = None):
     """Calculates time between timestamps and shows the result
+
+    Args:
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    data, result = Timer().calculateTerms(Timer().loadTimestamps())
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    data, result = timer.calculateTerms(timer.loadEpochs())
     printTable(data, result)
 
 
-def days():
+def days(name: str = None):
     """Calculates time for each day
+
+    Args:
+        name (str, optional): Timer name or "all". Defaults to None (default timer).
     """
-    data, result = Timer().calculateDays(Timer().loadTimestamps())
-    printTable(data, result)
+    printReport(name, "days")
 
 
-def today():
+def today(name: str = None):
     """Calculates time for each day
+
+    Args:
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    data, result = Timer().calculateToday(Timer().loadTimestamps())
+    import datetime
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    offset, epochs = timer.loadTail(firstDate=datetime.date.today())
+    data, result = timer.calculateToday(epochs)
+    printTable(data)
+
+
+def between(first: str = None, last: str = None, name: str = None):
+    """Calculates time between two dates
+
+    Args:
+        first (str, optional): First date. Defaults to None.
+        last (str, optional): Last date. Defaults to first date.
+        name (str, optional): Timer name. Defaults to None (default timer).
+    """
+    from core import Table
+    import datetime
+    if first is None:
+        prints("Missing date, use 'range " + datetime.date.today().strftime(Table.dateFormat) + "' or 'range FIRST LAST [NAME]'.")
+        return
+    # Only one date and timer name can be given ("range FIRST NAME")
+    if name is None and last is not None and Table.readableStringToDate(last) is None and last in Timer().getTimerNames():
+        last, name = None, last
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    firstDate = Table.readableStringToDate(first)
+    lastDate = firstDate if last is None else Table.readableStringToDate(last)
+    if firstDate is None or lastDate is None:
+        prints("Dates have to be in the " + datetime.date.today().strftime(Table.dateFormat) + " format.")
+        return
+    data, result = timer.summarizeRange(timer.loadDays(), firstDate, lastDate)
     printTable(data)
 
 
-def months():
+def months(name: str = None):
     """Calculates time for each month
+
+    Args:
+        name (str, optional): Timer name or "all". Defaults to None (default timer).
     """
-    data, result = Timer().calculateMonths(Timer().loadTimestamps())
-    printTable(data, result)
+    printReport(name, "months")
 
 
-def weeks():
+def weeks(name: str = None):
     """Calculates time for each week
+
+    Args:
+        name (str, optional): Timer name or "all". Defaults to None (default timer).
     """
-    data, result = Timer().calculateWeeks(Timer().loadTimestamps())
-    printTable(data, result)
+    printReport(name, "weeks")
 
 
-def years():
+def years(name: str = None):
     """Calculates time for each year
+
+    Args:
+        name (str, optional): Timer name or "all". Defaults to None (default timer).
     """
-    data, result = Timer().calculateYears(Timer().loadTimestamps())
-    printTable(data, result)
+    printReport(name, "years")
+
+
+def export(report: str, outputFormat: str = "csv", path: str = None, name: str = None):
+    """Writes terms or time spent in buckets as CSV or JSON Lines
+
+    Args:
+        report (str): Report name
+        outputFormat (str, optional): Output format ("csv" or "jsonl"). Defaults to "csv".
+        path (str, optional): Output file. Defaults to None (standard output).
+        name (str, optional): Timer name. Defaults to None (default timer).
+    """
+    from core import Export
+    # Timer name can be given instead of the format or the file ("export days NAME", "export days csv NAME")
+    if name is None and outputFormat not in Export.formats and path is None and outputFormat in Timer().getTimerNames():
+        outputFormat, name = "csv", outputFormat
+    elif name is None and path is not None and path in Timer().getTimerNames():
+        path, name = None, path
+    if report not in Export.reports or outputFormat not in Export.formats:
+        prints("Use 'export " + "|".join(Export.reports) + " [" + "|".join(Export.formats) + "] [FILE] [NAME]'.")
+        return
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    if path is None:
+        Export.exportRows(Export.iterateRows(report, timer), outputFormat, sys.stdout)
+        return
+    with Profiler().measure("write"), open(path, "w", newline="") as file:
+        count = Export.exportRows(Export.iterateRows(report, timer), outputFormat, file)
+    prints(str(count) + " rows were exported to " + path + ".")
+
+
+def importTimestamps(path: str, name: str = None):
+    """Adds terms or timestamps from a CSV, JSON Lines or JSON file to saved timestamps
+
+    Args:
+        path (str): Path to the file
+        name (str, optional): Timer name. Defaults to None (default timer).
+    """
+    import os
+    from core import Import
+    if not os.path.isfile(path):
+        prints("File " + path + " doesn't exist.")
+        return
+    if path.rsplit(".", 1)[-1].lower() not in Import.formats:
+        prints("Only " + ", ".join("." + extension for extension in Import.formats) + " files can be imported.")
+        return
+    timer = getTimer(name)
+    if timer is None:
+        return
+    rejected, statistics = Import.importFile(path, timer)
+    if len(rejected) > 0:
+        printTable([{"row": str(number), "reason": reason} for number, reason in rejected])
+        print()
+    printTable([{"metric": name, "value": str(value)} for name, value in statistics.items()], paged=False)
+
+
+def team(report: str, *folders):
+    """Calculates combined time of several timestamps folders (one column for each folder)
+    Report names are singular, so that they are not confused with commands.
 
+    Args:
+        report (str): "day", "week", "month" or "year"
+        folders (str): Folder names (or paths)
+    """
+    import os
+    if report not in ("day", "week", "month", "year") or len(folders) == 0:
+        prints("Use 'team [day|week|month|year] FOLDER [FOLDER ...]'.")
+        return
+    for folder in folders:
+        with Timer().useFolder(folder):
+            if not Timer().folderExists():
+                prints("Folder " + Timer().getFolderPath() + " doesn't exist.")
+                return
+    paths = [os.path.normpath(folder) for folder in folders]
+    if len(set(paths)) < len(paths):
+        prints("Each folder can be used only once.")
+        return
+    # Folders with the same name (in different directories) are shown with their whole paths
+    names = [os.path.basename(path) for path in paths]
+    if len(set(names)) < len(names):
+        names = paths
+    printSources(Timer().loadFolderDays(folders), names, report + "s")
 
-def erase():
+
+def erase(name: str = None):
     """Erasing last timestamp
+
+    Args:
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    timestamps = Timer().loadTimestamps()
-    if len(timestamps) == 0:
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    if timer.loadLastTimestamp() is None:
         prints("No timestamps found.")
         return
-    timestamps.pop()
-    if Timer().saveTimestamps(timestamps):
+    if timer.eraseTimestamp():
         prints("Successfully removed last timestamp.")
     else:
         prints("An error occured while saving file.")
 
 
-def delete():
+def delete(name: str = None):
     """Deleting the whole file
+
+    Args:
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    if Timer().deleteFile():
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    if timer.deleteFile():
         prints("Successfully removed file with timestamps.")
     else:
         prints("An error occured while deleting file with timestamps.")
 
 
-def status():
+def status(name: str = None):
     """Shows app status
+
+    Args:
+        name (str, optional): Timer name. Defaults to None (default timer).
     """
-    if Timer().fileExists():
-        timestamps = Timer().loadTimestamps()
-        if len(timestamps) > 0:
-            if timestamps[-1]["type"] == "start":
+    timer = getTimer(name, False)
+    if timer is None:
+        return
+    if timer.fileExists():
+        last = timer.loadLastTimestamp()
+        if last is not None:
+            if last["type"] == "start":
                 prints("Current term is not closed. Time calculation will use current time as a STOP timestamp.")
             else:
                 prints("Current term is closed.")
@@ -302,87 +492,263 @@ commandList = [
     },
     {
         "command": "status",
-        "description": "Prints out information about the timestamps",
+        "description": "Prints out information about the timestamps (status [NAME])",
     },
     {
         "command": "show",
-        "description": "Shows list of timestamps",
+        "description": "Shows list of timestamps (show [--last N | --since DATE] [NAME])",
     },
     {
         "command": "start",
-        "description": "Adds new START timestamp",
+        "description": "Adds new START timestamp (start [NAME])",
     },
     {
         "command": "stop",
-        "description": "Adds new STOP timestamp",
+        "description": "Adds new STOP timestamp (stop [NAME])",
     },
     {
         "command": "erase",
-        "description": "Removes last timestamp"
+        "description": "Removes last timestamp (erase [NAME])"
     },
     {
         "command": "delete",
-        "description": "Deletes the whole file"
+        "description": "Deletes the whole file (delete [NAME])"
     },
     {
         "command": "terms",
-        "description": "Calculates time spent between timestamps",
+        "description": "Calculates time spent between timestamps (terms [NAME])",
     },
     {
         "command": "days",
-        "description": "Calculates time spent day by day",
+        "description": "Calculates time spent day by day (days [NAME|all])",
     },
     {
         "command": "weeks",
-        "description": "Calculates time spent for each week",
+        "description": "Calculates time spent for each week (weeks [NAME|all])",
     },
     {
         "command": "months",
-        "description": "Calculates time spent for each month",
+        "description": "Calculates time spent for each month (months [NAME|all])",
     },
     {
         "command": "years",
-        "description": "Calculates time spent for each year",
+        "description": "Calculates time spent for each year (years [NAME|all])",
     },
     {
         "command": "today",
-        "description": "Calculates time spent on the current day",
+        "description": "Calculates time spent on the current day (today [NAME])",
+    },
+    {
+        "command": "range",
+        "description": "Calculates time spent between two dates (range FIRST [LAST] [NAME])",
+        "function": "between",
+    },
+    {
+        "command": "export",
+        "description": "Writes terms or time spent as CSV or JSON Lines (export terms|days|weeks|months|years [csv|jsonl] [FILE] [NAME])",
+    },
+    {
+        "command": "import",
+        "description": "Adds terms or timestamps from a file (import FILE.csv|FILE.jsonl|FILE.json [NAME])",
+        "function": "importTimestamps",
+    },
+    {
+        "command": "team",
+        "description": "Calculates combined time of several timestamps folders (team day|week|month|year FOLDER ...)",
+    },
+    {
+        "command": "storage",
+        "description": "Shows storage of timestamps or moves them (storage [json|journal|sqlite|binary] [NAME])",
+    },
+    {
+        "command": "compact",
+        "description": "Moves timestamps of closed years or months into an archive (compact [year|month] [NAME])",
+    },
+    {
+        "command": "stats",
+        "description": "Summarizes last executed commands (stats [N])",
+    },
+    {
+        "command": "serve",
+        "description": "Keeps running and serves commands from other instances",
     },
     {
         "command": "exit",
         "description": "Exits the application"
     }
 ]
+# Command names can't be used as timer names, they start a new command on the command line
+Timer.reservedNames = Timer.reservedNames + tuple(commands["command"] for commands in commandList)
+
+
+def findCommand(name: str) -> dict:
+    """Searches list of commands
+
+    Args:
+        name (str): Command name
+
+    Returns:
+        dict: Found command or None
+    """
+    for commands in commandList:
+        if name == commands["command"]:
+            return commands
+    return None
+
+
+def getFunction(commands: dict):
+    """Returns function running the specified command
+
+    Args:
+        commands (dict): Command from the list of commands
+
+    Returns:
+        function: Function of the command
+    """
+    return getattr(sys.modules[__name__], commands.get("function", commands["command"]))
+
+
+def countArguments(function) -> tuple:
+    """Counts arguments of a command function (without importing inspect module)
+
+    Args:
+        function (function): Function of a command
+
+    Returns:
+        tuple: Number of required arguments, maximal number of arguments (None if it accepts any number)
+    """
+    maxArgs = function.__code__.co_argcount
+    minArgs = maxArgs - len(function.__defaults__ or ())
+    # Functions with *args accept any number of further arguments
+    if function.__code__.co_flags & 0x04:
+        maxArgs = None
+    return minArgs, maxArgs
+
+
+def splitCommands(args: list) -> list:
+    """Splits command line arguments into commands with their arguments
+    Argument matching a command name starts a new command, unless the previous command still misses required arguments.
+
+    Args:
+        args (list): List of arguments
+
+    Returns:
+        list: List of commands (strings)
+    """
+    commands = []
+    missing = 0
+    for arg in args:
+        found = findCommand(arg)
+        if len(commands) == 0 or (found is not None and missing <= 0):
+            commands.append(arg)
+            missing = countArguments(getFunction(found))[0] if found is not None else 0
+        else:
+            commands[-1] += " " + arg
+            missing -= 1
+    return commands
 
 
 def execute(command: str):
     """Attempts to execute the specified command
 
     Args:
-        command (str): Command to run
+        command (str): Command to run (with arguments separated by spaces)
     """
+    words = command.split()
+    name = words[0] if len(words) > 0 else ""
     # Searcing list of commands
-    for commands in commandList:
-        if command == commands["command"]:
-            getattr(sys.modules[__name__], commands["command"])()
+    commands = findCommand(name)
+    if commands is not None:
+        function = getFunction(commands)
+        # Checking number of arguments
+        minArgs, maxArgs = countArguments(function)
+        if not minArgs <= len(words) - 1 <= (len(words) - 1 if maxArgs is None else maxArgs):
+            prints("Wrong number of arguments for command '" + name + "'.")
             print()
             return
+        # Running the command while collecting statistics
+        Profiler().reset()
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        function(*words[1:])
+        if profile is not None:
+            profile.disable()
+        Profiler().saveRun(Timer().getStatsPath(), command, time.perf_counter() - start)
+        if Profiler().enabled:
+            print()
+            printTable(Profiler().getMetrics(), paged=False)
+        print()
+        return
     # Message in case the command is not found
     prints("Command '" + command + "' not found, use '" + commandList[0]["command"] + "' to list all usable commands.")
     print()
 
 
+def popOption(args: list, name: str) -> str:
+    """Removes an option with a value (--name VALUE or --name=VALUE) from arguments
+
+    Args:
+        args (list): List of arguments
+        name (str): Option name
+
+    Returns:
+        str: Option value (empty if missing) or None if the option is not used
+    """
+    for i, arg in enumerate(args[1:], 1):
+        if arg.startswith(name + "="):
+            args.pop(i)
+            return arg[len(name) + 1:]
+        if arg == name:
+            args.pop(i)
+            return args.pop(i) if i < len(args) else ""
+    return None
+
+
 def main(args: list):
     """Running timer as a console app
+    Option --profile prints statistics after each command, --profile=FILE also saves cProfile data to a file.
+    Option --jobs N calculates reports in N processes, --limit N and --offset N print only a part of each table.
 
     Args:
         args (list): List of arguments
     """
+    global profile, limit, offset
+    profileFile = None
+    for arg in [arg for arg in args[1:] if arg == "--profile" or arg.startswith("--profile=")]:
+        args.remove(arg)
+        Profiler().enabled = True
+        if arg.startswith("--profile="):
+            import cProfile
+            profileFile = arg[len("--profile="):]
+            profile = cProfile.Profile()
+    values = {}
+    for name in ("--jobs", "--limit", "--offset"):
+        value = popOption(args, name)
+        if value is not None and not value.isdigit():
+            prints("Option " + name + " needs a number, for example '" + name + " 10'.")
+            return
+        values[name] = value
+    if values["--jobs"] is not None:
+        Timer.jobs = max(1, int(values["--jobs"]))
+    if values["--limit"] is not None:
+        limit = int(values["--limit"])
+    if values["--offset"] is not None:
+        offset = int(values["--offset"])
     try:
         if len(args) > 1:
-            # Executes arguments (if exist)
-            for command in sys.argv[1:]:
-                execute(command)
+            # Executes arguments (if exist), using running server when possible
+            # Import and export use files in the current working directory and export can print huge output, so they always run locally
+            commands = splitCommands(args[1:])
+            output = None
+            if not Profiler().enabled and all(value is None for value in values.values()) and all(command.split()[0] not in ("serve", "exit", "import", "export") for command in commands):
+                from core.Server import Server
+                output = Server(Timer().getSocketPath()).request(commands)
+            if output is not None:
+                sys.stdout.write(output)
+            else:
+                for command in commands:
+                    execute(command)
         else:
             # Asking for commands
             execute('help')
@@ -390,6 +756,9 @@ def main(args: list):
                 execute(input('Enter command: '))
     except (SystemExit, KeyboardInterrupt):
         prints("Exitting...")
+    finally:
+        if profile is not None:
+            profile.dump_stats(profileFile)
     
 
 #########################################################################################
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from core.Timer import *
-import unittest, random
+from core import Table, Export, Import
+import unittest, random, json, multiprocessing, io, contextlib
 
 
 class Tests(unittest.TestCase):
@@ -35,6 +36,20 @@ class Tests(unittest.TestCase):
     #########################################################################################
 
 
+    def punchRepeatedly(self, count: int, queue):
+        """Adds alternating timestamps and reports how many were added
+
+        Args:
+            count (int): Number of attempts
+            queue (multiprocessing.Queue): Queue for number of added timestamps
+        """
+        added = 0
+        for i in range(count):
+            if Timer().startTimestamp() or Timer().stopTimestamp():
+                added += 1
+        queue.put(added)
+
+
     def setUp(self):
         """Called before each test
         """
@@ -54,6 +69,8 @@ class Tests(unittest.TestCase):
         """Tests if the Timer class is a singleton
         """
         self.assertEqual(Timer(), Timer())
+        self.assertIs(Timer("projectA"), Timer("projectA"))
+        self.assertIsNot(Timer("projectA"), Timer())
     
 
     def test_createDelete(self):
@@ -94,6 +111,444 @@ class Tests(unittest.TestCase):
                         print("Timestamps (" + str(len(timestamps[:i])) + "): " + str(timestamps[:i]))
                         raise e
                 lastTime = currentTime
+        # Vectorized calculation (used when NumPy is installed) has to match the pure Python one
+        if Timer().getNumpy() is not None:
+            try:
+                for i in range(0, len(timestamps), 100):
+                    for function in functions:
+                        Timer().vectorize = False
+                        expected = function(timestamps[:i])
+                        Timer().vectorize = True
+                        self.assertEqual(function(timestamps[:i]), expected)
+            finally:
+                Timer().vectorize = True
+
+
+
+    def test_journal(self):
+        """Checks punches appended to the journal and migration from a JSON file
+        """
+        timestamps = self.generateTimestamps(20)
+        Timer().storage = "json"
+        Timer().saveTimestamps(timestamps)
+        Timer().storage = None
+        self.assertEqual(Timer().loadTimestamps(), timestamps)
+        self.assertTrue(Timer().startTimestamp())
+        self.assertFalse(Timer().startTimestamp())
+        self.assertTrue(Timer().stopTimestamp())
+        self.assertFalse(Timer().stopTimestamp())
+        loaded = Timer().loadTimestamps()
+        self.assertEqual(loaded[:-2], timestamps)
+        self.assertEqual([timestamp["id"] for timestamp in loaded[-2:]], [21, 22])
+        self.assertEqual(Timer().loadLastTimestamp(), loaded[-1])
+        with open(Timer().getFilePath(), "a") as file:
+            file.write('{"id": 23, "type"')
+        self.assertEqual(Timer().loadLastTimestamp(), loaded[-1])
+        self.assertEqual(Timer().loadTail(count=2), (20, array.array("q", [loaded[-2]["timestamp"], loaded[-1]["timestamp"]])))
+
+
+    def test_storages(self):
+        """Checks migration between storages and calculations on each of them
+        """
+        timestamps = self.generateTimestamps(301)
+        Timer().saveTimestamps(timestamps)
+        for name in ("sqlite", "binary", "json", "journal"):
+            self.assertTrue(Timer().migrateStorage(name))
+            self.assertFalse(Timer().migrateStorage(name))
+            self.assertEqual(Timer().getStorageName(), name)
+            self.assertEqual(Timer().loadTimestamps(), timestamps)
+            self.assertEqual([storage for storage in ("json", "journal", "sqlite", "binary") if Timer().getStorage(storage).exists()], [name])
+            Timer().deleteRollup()
+            self.assertEqual(Timer().loadDays(), Timer().calculateBuckets(timestamps, Timer().getDayBucket))
+            self.assertTrue(Timer().stopTimestamp())
+            self.assertEqual(Timer().loadLastTimestamp()["id"], 302)
+            self.assertTrue(Timer().eraseTimestamp())
+            self.assertEqual(Timer().loadLastTimestamp(), timestamps[-1])
+
+
+    def test_tail(self):
+        """Checks that timestamps read from the end of each storage match the whole history
+        """
+        timestamps = self.generateTimestamps(201)
+        epochs = Timer().toEpochs(timestamps)
+        dates = sorted(set(datetime.datetime.fromtimestamp(timestamp["timestamp"]).date() for timestamp in timestamps))
+        for name in ("journal", "json", "sqlite", "binary"):
+            Timer().storage = name
+            try:
+                Timer().saveTimestamps(timestamps)
+                for cached in (False, True):
+                    if cached:
+                        Timer().loadEpochs()
+                    else:
+                        Timer().snapshotKey = None
+                    offset, tail = Timer().loadTail(count=5)
+                    self.assertEqual((offset, list(tail)), (196, list(epochs[-5:])))
+                    for firstDate in random.sample(dates, 10) + [datetime.date.today()]:
+                        offset, tail = Timer().loadTail(firstDate=firstDate)
+                        self.assertEqual(offset % 2, 0)
+                        self.assertEqual(list(tail), list(epochs[offset:]))
+                        self.assertEqual(Timer().calculateRange(tail, firstDate), Timer().calculateRange(timestamps, firstDate))
+                    self.assertEqual(Timer().calculateToday(Timer().loadTail(firstDate=datetime.date.today())[1]), Timer().calculateToday(timestamps))
+                Timer().deleteFile()
+            finally:
+                Timer().storage = None
+
+
+    def test_journalUnfinishedLine(self):
+        """Checks that a timestamp added after an interrupted write doesn't continue its unfinished line
+        """
+        timestamps = self.generateTimestamps(100)
+        Timer().saveTimestamps(timestamps)
+        with open(Timer().getFilePath(), "a") as file:
+            file.write('{"id": 101, "type"')
+        self.assertEqual(Timer().loadTimestamps(), timestamps)
+        self.assertTrue(Timer().startTimestamp())
+        self.assertTrue(Timer().stopTimestamp())
+        Timer().snapshotKey = None
+        self.assertEqual([timestamp["id"] for timestamp in Timer().loadTimestamps()], list(range(1, 103)))
+        self.assertEqual(Timer().loadTimestamps()[:-2], timestamps)
+
+
+    def test_binary(self):
+        """Checks memory-mapped binary timestamps, including a record left unfinished by an interrupted write
+        """
+        timestamps = self.generateTimestamps(100)
+        Timer().storage = "binary"
+        try:
+            Timer().saveTimestamps(timestamps)
+            Timer().snapshotKey = None
+            self.assertIsInstance(Timer().loadEpochs(), memoryview)
+            self.assertEqual(Timer().calculateDays(Timer().loadEpochs()), Timer().calculateDays(timestamps))
+            with open(Timer().getFilePath(), "ab") as file:
+                file.write(b"\x01\x02\x03")
+            self.assertEqual(Timer().loadTimestamps(), timestamps)
+            self.assertTrue(Timer().startTimestamp())
+            self.assertEqual(os.path.getsize(Timer().getFilePath()), 8 + 101 * 8)
+            self.assertEqual(Timer().loadTimestamps()[:-1], timestamps)
+        finally:
+            Timer().storage = None
+
+
+    def test_totalBetween(self):
+        """Compares totals for random date ranges with daily calculation
+        """
+        timestamps = self.generateTimestamps(500)
+        data, result = Timer().calculateDays(timestamps)
+        dates = [row["date"] for row in data]
+        for i in range(200):
+            firstDate, lastDate = sorted(random.sample(dates, 2))
+            expected = sum(row["time"] for row in data if firstDate <= row["date"] <= lastDate)
+            self.assertEqual(Timer().totalBetween(timestamps, firstDate, lastDate), expected)
+
+
+    def test_summarizeRange(self):
+        """Compares range summaries from day buckets with daily calculation
+        """
+        timestamps = self.generateTimestamps(500)
+        data, result = Timer().calculateDays(timestamps)
+        days = Timer().calculateBuckets(timestamps, Timer().getDayBucket)
+        dates = [row["date"] for row in data]
+        for i in range(200):
+            firstDate, lastDate = sorted(random.sample(dates, 2))
+            expected = sum(row["time"] for row in data if firstDate <= row["date"] <= lastDate)
+            self.assertEqual(Timer().summarizeRange(days, firstDate, lastDate)[1]["time"], expected)
+
+
+    def test_rollup(self):
+        """Checks that saved time for each day matches calculation from timestamps
+        """
+        timestamps = self.generateTimestamps(200)
+        Timer().saveTimestamps(timestamps)
+        self.assertEqual(Timer().loadDays(), Timer().calculateBuckets(timestamps, Timer().getDayBucket))
+        self.assertTrue(Timer().startTimestamp())
+        self.assertTrue(Timer().stopTimestamp())
+        self.assertEqual(Timer().loadRollup()["count"], 202)
+        self.assertEqual(Timer().loadDays(), Timer().calculateBuckets(Timer().loadTimestamps(), Timer().getDayBucket))
+        for i in range(4):
+            Timer().eraseTimestamp()
+        self.assertEqual(Timer().loadDays(), Timer().calculateBuckets(timestamps[:-2], Timer().getDayBucket))
+        # Rollup which can't be saved is calculated in memory
+        Timer().deleteRollup()
+        os.mkdir(Timer().getRollupPath())
+        self.assertEqual(Timer().loadDays(), Timer().calculateBuckets(timestamps[:-2], Timer().getDayBucket))
+        self.assertTrue(os.path.isdir(Timer().getRollupPath()))
+
+
+    def test_snapshot(self):
+        """Checks that cached timestamps are reused until the file changes and can't be changed by callers
+        """
+        timestamps = self.generateTimestamps(100)
+        Timer().saveTimestamps(timestamps)
+        snapshot = Timer().loadSnapshot()
+        self.assertIs(Timer().loadSnapshot(), snapshot)
+        loaded = Timer().loadTimestamps()
+        loaded.pop()
+        Timer().calculateDays(loaded)
+        self.assertEqual(list(Timer().loadSnapshot()), timestamps)
+        self.assertTrue(Timer().startTimestamp())
+        self.assertEqual(len(Timer().loadSnapshot()), 101)
+        with open(Timer().getFilePath(), "a") as file:
+            file.write(json.dumps({"id": 102, "type": "stop", "timestamp": int(time.time())}) + "\n")
+        self.assertEqual(Timer().loadSnapshot()[-1]["id"], 102)
+
+
+    def test_sharedDays(self):
+        """Checks that time spent for each day is shared by reports until the file changes
+        """
+        timestamps = self.generateTimestamps(151)
+        Timer().saveTimestamps(timestamps)
+        days = Timer().loadDays()
+        Profiler().reset()
+        self.assertEqual(Timer().loadDays(), days)
+        self.assertEqual(Profiler().counters.get("bytes read", 0), 0)
+        self.assertEqual(Timer().loadDays(), Timer().calculateBuckets(timestamps, Timer().getDayBucket))
+        self.assertTrue(Timer().stopTimestamp())
+        self.assertEqual(Timer().loadDays(), Timer().calculateBuckets(Timer().loadTimestamps(), Timer().getDayBucket))
+
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requires fork")
+    def test_concurrentPunches(self):
+        """Checks that no timestamps are lost when multiple processes punch at once
+        """
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        processes = [context.Process(target=self.punchRepeatedly, args=(50, queue)) for i in range(8)]
+        for process in processes:
+            process.start()
+        added = sum(queue.get() for process in processes)
+        for process in processes:
+            process.join()
+        timestamps = Timer().loadTimestamps()
+        self.assertEqual(len(timestamps), added)
+        self.assertEqual([timestamp["id"] for timestamp in timestamps], list(range(1, added + 1)))
+        self.assertEqual([timestamp["type"] for timestamp in timestamps], [("start", "stop")[i % 2] for i in range(added)])
+        self.assertEqual(Timer().loadDays(), Timer().calculateBuckets(timestamps, Timer().getDayBucket))
+        self.assertEqual([name for name in os.listdir(Timer().getFolderPath()) if name.endswith(".tmp")], [])
+
+
+    def test_archive(self):
+        """Checks that timestamps moved into archived segments are still loaded and calculated correctly
+        """
+        timestamps = self.generateTimestamps(300)
+        Timer().saveTimestamps(timestamps)
+        days = Timer().calculateBuckets(timestamps, Timer().getDayBucket)
+        archived = Timer().compact("month")
+        self.assertGreater(archived, 0)
+        self.assertEqual(Timer().compact("month"), 0)
+        Timer().snapshotKey = None
+        self.assertEqual(Timer().loadTimestamps(), timestamps)
+        Timer().snapshotKey = None
+        Timer().deleteRollup()
+        Profiler().reset()
+        self.assertEqual(Timer().loadDays(), days)
+        self.assertNotIn("segments read", Profiler().counters)
+        epochs = Timer().toEpochs(timestamps)
+        since = datetime.datetime.fromtimestamp(timestamps[10]["timestamp"]).date()
+        for count, firstDate in ((300 - archived + 10, None), (None, since)):
+            Timer().snapshotKey = None
+            offset = Storage.getTailOffset(epochs, count, None if firstDate is None else int(datetime.datetime.timestamp(datetime.datetime.combine(firstDate, datetime.time.min))))
+            self.assertEqual(Timer().loadTail(count, firstDate), (offset, epochs[offset:]))
+        self.assertTrue(Timer().startTimestamp())
+        self.assertTrue(Timer().stopTimestamp())
+        self.assertEqual(Timer().loadLastTimestamp()["id"], 302)
+        for i in range(3):
+            self.assertTrue(Timer().eraseTimestamp())
+        self.assertEqual(Timer().loadTimestamps(), timestamps[:-1])
+        self.assertTrue(Timer().migrateStorage("sqlite"))
+        Timer().snapshotKey = None
+        self.assertEqual(Timer().loadTimestamps(), timestamps[:-1])
+        self.assertTrue(Timer().migrateStorage("journal"))
+
+
+    def test_parallelCalculation(self):
+        """Checks that calculations in multiple processes (with and without NumPy) match calculations in a single process
+        """
+        timestamps = self.generateTimestamps(1000)
+        functions = (Timer().calculateDays, Timer().calculateWeeks, Timer().calculateMonths, Timer().calculateYears)
+        expected = [function(timestamps) for function in functions]
+        try:
+            Timer().jobs = 2
+            for vectorize in (False, True):
+                Timer().vectorize = vectorize
+                for chunkSize in (None, 2, 51, 5000):
+                    Timer().chunkSize = chunkSize
+                    self.assertEqual([function(timestamps) for function in functions], expected)
+        finally:
+            Timer().vectorize = True
+            Timer().jobs = 1
+            Timer().chunkSize = None
+
+
+    def test_table(self):
+        """Checks that only rows within limit and offset are printed and that they are formatted like the whole table
+        """
+        timestamps = self.generateTimestamps(50)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            Table.printTable(iter(timestamps), limit=5, offset=10)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertEqual([int(line.split()[0]) for line in lines[2:]], [11, 12, 13, 14, 15])
+        self.assertIn(Table.timeToReadableString(timestamps[10]["timestamp"]), lines[2])
+
+
+    def test_export(self):
+        """Checks that exported rows match calculated terms and days
+        """
+        timestamps = self.generateTimestamps(200)
+        Timer().saveTimestamps(timestamps)
+        output = io.StringIO()
+        self.assertEqual(Export.exportRows(Export.iterateRows("terms"), "csv", output), 100)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "id,start,stop,time")
+        self.assertEqual([list(map(int, line.split(","))) for line in lines[1:]], [list(row.values()) for row in Timer().calculateTerms(timestamps)[0]])
+        output = io.StringIO()
+        Export.exportRows(Export.iterateRows("days"), "jsonl", output)
+        days = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(days, [{"first": first.isoformat(), "last": last.isoformat(), "time": delta} for first, last, delta in Timer().calculateBuckets(timestamps, Timer().getDayBucket)])
+
+
+    def test_exportCommand(self):
+        """Checks that report names given to export aren't split into separate commands
+        """
+        import Main
+        timestamps = self.generateTimestamps(200)
+        Timer().saveTimestamps(timestamps)
+        path = os.path.join(Timer().getFolderPath(), "days.csv")
+        self.assertEqual(Main.splitCommands(["export", "days", "csv", path, "days"]), ["export days csv " + path, "days"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            Main.main(["Main.py", "export", "days", "csv", path])
+        with open(path) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(lines[0], "first,last,time")
+        self.assertEqual(len(lines) - 1, len(Timer().calculateBuckets(timestamps, Timer().getDayBucket)))
+
+
+    def test_import(self):
+        """Checks that imported timestamps are merged with saved ones and invalid rows are rejected
+        """
+        timestamps = self.generateTimestamps(100)
+        Timer().saveTimestamps(timestamps[:50] + timestamps[60:])
+        path = os.path.join(Timer().getFolderPath(), "import.csv")
+        with open(path, "w") as file:
+            file.write("type,timestamp\n")
+            for timestamp in reversed(timestamps[50:60]):
+                file.write(timestamp["type"] + "," + str(timestamp["timestamp"]) + "\n")
+            file.write("stop,yesterday\n")
+            file.write("start," + str(timestamps[0]["timestamp"]) + "\nstop," + str(timestamps[1]["timestamp"]) + "\n")
+        rejected, statistics = Import.importFile(path)
+        self.assertEqual(statistics["imported terms"], 5)
+        self.assertEqual(rejected, [(12, "invalid time"), (13, "overlaps saved term")])
+        self.assertEqual(Timer().loadTimestamps(), timestamps)
+        # Named timer gets only the imported terms
+        rejected, statistics = Import.importFile(path, Timer("projectA"))
+        self.assertEqual(statistics["imported terms"], 6)
+        self.assertEqual(Timer("projectA").loadTimestamps(), [dict(timestamp, id=i + 1) for i, timestamp in enumerate(timestamps[:2] + timestamps[50:60])])
+        self.assertEqual(Timer().loadTimestamps(), timestamps)
+
+
+    def test_team(self):
+        """Checks that merged time of several folders matches time of each folder
+        """
+        folders = [os.path.join(Timer().folderName, name) for name in ("alice", "bob", "carol")]
+        sources = []
+        for folder in folders:
+            with Timer().useFolder(folder):
+                Timer().createFolder()
+                timestamps = self.generateTimestamps(random.randrange(0, 200, 2))
+                # Folder with a JSON file which wasn't migrated yet
+                if folder.endswith("carol"):
+                    Timer().getStorage("json").write(timestamps)
+                else:
+                    Timer().saveTimestamps(timestamps)
+                sources.append(Timer().calculateBuckets(timestamps, Timer().getDayBucket))
+        files = [sorted(os.listdir(os.path.join(os.path.dirname(Timer().getFolderPath()), folder))) for folder in folders]
+        self.assertEqual(Timer().loadFolderDays(folders), sources)
+        # Folders of other people are only read
+        self.assertEqual([sorted(os.listdir(os.path.join(os.path.dirname(Timer().getFolderPath()), folder))) for folder in folders], files)
+        data, result = Timer().summarizeSources(sources, ["alice", "bob", "carol"], "weeks")
+        for i, name in enumerate(["alice", "bob", "carol"]):
+            weeks = Timer().summarizeWeeks(sources[i])[0]
+            self.assertEqual([row["time"] for row in weeks], [row["time " + name] for row in data if row["time " + name] > 0])
+        self.assertEqual(result["time"], sum(delta for days in sources for firstDate, lastDate, delta in days))
+        # Sources named like other columns don't replace them
+        data, result = Timer().summarizeSources(sources, ["id", "date", "time"], "days")
+        self.assertEqual([row["id"] for row in data], list(range(1, len(data) + 1)))
+        self.assertTrue(all(row["time"] == row["time id"] + row["time date"] + row["time time"] for row in data))
+
+
+    def test_namedTimers(self):
+        """Checks that named timers keep their timestamps separately inside the default folder
+        """
+        timestamps = self.generateTimestamps(100)
+        Timer().saveTimestamps(timestamps)
+        self.assertEqual(Timer().getTimerNames(), [])
+        self.assertTrue(Timer("projectA").startTimestamp())
+        self.assertTrue(Timer("projectB").startTimestamp())
+        self.assertTrue(Timer("projectA").stopTimestamp())
+        self.assertEqual(Timer().getTimerNames(), ["projectA", "projectB"])
+        self.assertTrue(Timer("projectA").getFolderPath().startswith(Timer().getFolderPath()))
+        self.assertEqual(len(Timer("projectA").loadTimestamps()), 2)
+        self.assertEqual(Timer("projectB").loadLastTimestamp()["type"], "start")
+        self.assertEqual(Timer().loadTimestamps(), timestamps)
+        self.assertFalse(Timer.isValidName("all"))
+        self.assertFalse(Timer.isValidName("default"))
+        self.assertFalse(Timer.isValidName("../projectA"))
+        with self.assertRaises(ValueError):
+            Timer("../projectA")
+
+
+    def test_namedCommands(self):
+        """Checks that commands use timer given by the last argument
+        """
+        import Main
+        timestamps = self.generateTimestamps(100)
+        Timer().saveTimestamps(timestamps)
+        Timer("projectA").saveTimestamps(timestamps[:20])
+        path = os.path.join(Timer().getFolderPath(), "terms.csv")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            Main.execute("export terms csv " + path + " projectA")
+            Main.execute("export days jsonl projectA")
+            Main.execute("show --last 3 projectA")
+            Main.execute("delete projectA")
+            Main.execute("start days")
+            Main.execute("stop projectB")
+        with open(path) as file:
+            self.assertEqual(len(file.read().splitlines()), 11)
+        days = [json.loads(line) for line in output.getvalue().splitlines() if line.startswith("{")]
+        self.assertEqual(sum(day["time"] for day in days), sum(row["time"] for row in Timer().calculateTerms(timestamps[:20])[0]))
+        self.assertIn(Table.timeToReadableString(timestamps[17]["timestamp"]), output.getvalue())
+        self.assertFalse(Timer("projectA").fileExists())
+        self.assertFalse(Timer.isValidName("days"))
+        self.assertEqual(Timer().getTimerNames(), ["projectA"])
+        self.assertEqual(Timer().loadTimestamps(), timestamps)
+
+
+    def test_statsLimit(self):
+        """Checks that file with statistics is trimmed to the last runs when it grows too big
+        """
+        path = os.path.join(Timer().getFolderPath(), "stats.jsonl")
+        maxStatsSize, keptRuns = Profiler().maxStatsSize, Profiler().keptRuns
+        try:
+            Profiler().maxStatsSize, Profiler().keptRuns = 2000, 5
+            for i in range(100):
+                Profiler().saveRun(path, "status " + str(i), 0.001)
+            self.assertLessEqual(os.path.getsize(path), 2000 + 200)
+            self.assertEqual(Profiler().loadRuns(path, 1000)[-1]["command"], "status 99")
+        finally:
+            Profiler().maxStatsSize, Profiler().keptRuns = maxStatsSize, keptRuns
+
+
+    def test_compactRepresentation(self):
+        """Checks that calculations on array of epoch seconds match calculations on list of timestamps
+        """
+        timestamps = self.generateTimestamps(300)
+        epochs = Timer().toEpochs(timestamps)
+        self.assertEqual(Timer().fromEpochs(epochs), timestamps)
+        for function in (Timer().calculateTerms, Timer().calculateDays, Timer().calculateWeeks, Timer().calculateMonths, Timer().calculateYears):
+            self.assertEqual(function(array.array("q", epochs)), function(timestamps))
+            self.assertEqual(function(memoryview(array.array("q", epochs))), function(timestamps))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+from core.Timer import Timer
+
+
+reports = ("terms", "days", "weeks", "months", "years")
+formats = ("csv", "jsonl")
+chunkSize = 4096
+
+
+def iterateRows(report: str, timer: Timer = None):
+    """Iterates through rows of a report calculated from saved timestamps
+    Rows are calculated one by one, so the whole report is never kept in memory.
+
+    Args:
+        report (str): Report name ("terms", "days", "weeks", "months" or "years")
+        timer (Timer, optional): Timer with the timestamps. Defaults to None (default timer).
+
+    Yields:
+        dict: Term (number, start and stop in epoch seconds, time spent in seconds) or bucket (first and last date in ISO format, time spent in seconds)
+    """
+    if timer is None:
+        timer = Timer()
+    epochs = timer.loadEpochs()
+    if report == "terms":
+        yield from timer.iterateTermRows(epochs)
+        return
+    getBucket = {"days": timer.getDayBucket, "weeks": timer.getWeekBucket, "months": timer.getMonthBucket, "years": timer.getYearBucket}[report]
+    for firstDate, lastDate, delta in timer.iterateBuckets(timer.iterateTerms(epochs), getBucket):
+        yield {"first": firstDate.isoformat(), "last": lastDate.isoformat(), "time": delta}
+
+
+def formatCsv(row: dict) -> str:
+    """Formats a row as a line of CSV (values are numbers and dates, so they are never quoted)
+
+    Args:
+        row (dict): Row
+
+    Returns:
+        str: Line of CSV
+    """
+    return ",".join(map(str, row.values())) + "\n"
+
+
+def formatJsonl(row: dict) -> str:
+    """Formats a row as a line of JSON Lines
+
+    Args:
+        row (dict): Row
+
+    Returns:
+        str: Line of JSON
+    """
+    import json
+    return json.dumps(row) + "\n"
+
+
+def exportRows(rows, format: str, file) -> int:
+    """Writes rows to a file in chunks as they are calculated
+
+    Args:
+        rows (iterable): Rows (dicts with the same keys)
+        format (str): Output format ("csv" or "jsonl")
+        file (file): File opened for writing (or standard output)
+
+    Returns:
+        int: Number of written rows
+    """
+    formatRow = formatCsv if format == "csv" else formatJsonl
+    count = 0
+    lines = []
+    for row in rows:
+        if count == 0 and format == "csv":
+            lines.append(",".join(row.keys()) + "\n")
+        lines.append(formatRow(row))
+        count += 1
+        if len(lines) >= chunkSize:
+            file.write("".join(lines))
+            lines = []
+    file.write("".join(lines))
+    return count
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+from core.Timer import Timer
+import datetime
+
+
+formats = ("csv", "jsonl", "json")
+
+
+def parseTime(value) -> int:
+    """Converts time from an imported row to epoch seconds
+
+    Args:
+        value (int|str): Epoch seconds or date and time in ISO format
+
+    Returns:
+        int: Epoch seconds
+
+    Raises:
+        ValueError: Value is not a valid time
+    """
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    if value.lstrip("-").isdigit():
+        return int(value)
+    return int(datetime.datetime.fromisoformat(value).timestamp())
+
+
+def iterateRecords(path: str):
+    """Iterates through rows of a CSV, JSON Lines or JSON file (format is chosen by extension)
+    CSV and JSON Lines files are read line by line.
+
+    Args:
+        path (str): Path to the file
+
+    Yields:
+        tuple: Row number and row (dict), None instead of a row which can't be read
+    """
+    import json
+    extension = path.rsplit(".", 1)[-1].lower()
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        if extension == "csv":
+            import csv
+            # Header is the first row
+            for number, row in enumerate(csv.DictReader(file), 2):
+                yield number, row
+        elif extension == "json":
+            for number, row in enumerate(json.load(file), 1):
+                yield number, row if isinstance(row, dict) else None
+        else:
+            for number, line in enumerate(file, 1):
+                if line.strip() == "":
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield number, row if isinstance(row, dict) else None
+
+
+def collectTerms(records, rejected: list) -> tuple:
+    """Converts imported rows (terms with start and stop or timestamps with type and timestamp) to terms
+    Timestamps are sorted by time first, START and STOP timestamps have to alternate.
+
+    Args:
+        records (iterable): Row numbers and rows
+        rejected (list): List for row numbers and reasons of rejected rows
+
+    Returns:
+        tuple: List of terms (start, stop and row number), number of rows
+    """
+    terms = []
+    punches = []
+    count = 0
+    for number, row in records:
+        count += 1
+        try:
+            if row is not None and "start" in row and "stop" in row:
+                terms.append((parseTime(row["start"]), parseTime(row["stop"]), number))
+            elif row is not None and row.get("type") in ("start", "stop") and "timestamp" in row:
+                punches.append((parseTime(row["timestamp"]), 0 if row["type"] == "start" else 1, number))
+            else:
+                rejected.append((number, "unknown row"))
+        except (ValueError, TypeError, OverflowError):
+            rejected.append((number, "invalid time"))
+    punches.sort()
+    start = None
+    for epoch, kind, number in punches:
+        if kind == 0:
+            if start is not None:
+                rejected.append((start[1], "START without STOP"))
+            start = (epoch, number)
+        elif start is None:
+            rejected.append((number, "STOP without START"))
+        else:
+            terms.append((start[0], epoch, start[1]))
+            start = None
+    if start is not None:
+        rejected.append((start[1], "START without STOP"))
+    return terms, count
+
+
+def importFile(path: str, timer: Timer = None) -> tuple:
+    """Adds terms from a file to saved timestamps (timestamps are saved only once)
+
+    Args:
+        path (str): Path to the file
+        timer (Timer, optional): Timer receiving the terms. Defaults to None (default timer).
+
+    Returns:
+        tuple: Rejected rows (row number and reason) sorted by row number, statistics (dict)
+    """
+    import time
+    rejected = []
+    start = time.perf_counter()
+    terms, count = collectTerms(iterateRecords(path), rejected)
+    imported = (Timer() if timer is None else timer).mergeTerms(terms, rejected)
+    duration = time.perf_counter() - start
+    rejected.sort()
+    statistics = {"rows": count, "imported terms": imported, "rejected rows": len(rejected), "rows per second": int(count / duration) if duration > 0 else count}
+    return rejected, statistics
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+
+class Lock(object):
+    """Advisory lock of a file shared by all processes working with the same timestamps
+    Lock can be entered repeatedly by the same process, it is released when the outermost with block ends.
+    On systems without fcntl module the lock only counts how many times it was entered.
+    """
+
+
+    def __init__(self, path: str):
+        """Creating lock for a lock file path
+
+        Args:
+            path (str): Path to the lock file
+        """
+        self.path = path
+        self.depth = 0
+        self.file = None
+
+
+    def __enter__(self):
+        """Waits until no other process holds the lock and acquires it
+        """
+        if self.depth == 0:
+            try:
+                import fcntl
+            except ImportError:
+                fcntl = None
+            if fcntl is not None:
+                self.file = open(self.path, "a")
+                try:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+                except BaseException:
+                    self.file.close()
+                    self.file = None
+                    raise
+        self.depth += 1
+        return self
+
+
+    def __exit__(self, *exception):
+        """Releases the lock (closing the file releases it)
+        """
+        self.depth -= 1
+        if self.depth == 0 and self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+import os, time
+
+
+class Measurement(object):
+    """Context manager adding time spent inside a with block to a timer
+    """
+
+
+    def __init__(self, timers: dict, name: str):
+        """Creating measurement of a timer
+
+        Args:
+            timers (dict): Timers
+            name (str): Timer name
+        """
+        self.timers = timers
+        self.name = name
+
+
+    def __enter__(self):
+        """Starting the measurement
+        """
+        self.start = time.perf_counter()
+
+
+    def __exit__(self, *exception):
+        """Adding measured time to the timer
+        """
+        self.timers[self.name] = self.timers.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class Profiler(object):
+    """Singleton for counters and timers of the currently executed command
+    """
+
+
+    enabled = False
+    maxStatsSize = 1024 * 1024
+    keptRuns = 1000
+
+
+    #########################################################################################
+
+
+    def __new__(cls):
+        """Creating class instance
+
+        Returns:
+            Profiler: Profiler class instance
+        """
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(Profiler, cls).__new__(cls)
+            cls.instance.reset()
+        return cls.instance
+
+
+    #########################################################################################
+
+
+    def reset(cls):
+        """Removes all counters and timers
+        """
+        cls.counters = {}
+        cls.timers = {}
+
+
+    def count(cls, name: str, amount: int = 1):
+        """Increases a counter
+
+        Args:
+            name (str): Counter name
+            amount (int, optional): Amount to add. Defaults to 1.
+        """
+        cls.counters[name] = cls.counters.get(name, 0) + amount
+
+
+    def measure(cls, name: str) -> Measurement:
+        """Measures time spent inside a with block and adds it to a timer
+
+        Args:
+            name (str): Timer name
+
+        Returns:
+            Measurement: Context manager
+        """
+        return Measurement(cls.timers, name)
+
+
+    def getMetrics(cls) -> list:
+        """Returns all counters and timers (in milliseconds)
+
+        Returns:
+            list: List of metrics for output
+        """
+        metrics = [{"metric": name, "value": str(value)} for name, value in sorted(cls.counters.items())]
+        metrics += [{"metric": name + " (ms)", "value": format(value * 1000, ".3f")} for name, value in sorted(cls.timers.items())]
+        return metrics
+
+
+    #########################################################################################
+
+
+    def formatValue(cls, value) -> str:
+        """Formats a string, number or dictionary as JSON (without importing json, which is slow to import)
+
+        Args:
+            value (str|int|float|dict): Value to format
+
+        Returns:
+            str: JSON representation
+        """
+        if isinstance(value, dict):
+            return "{" + ", ".join(cls.formatValue(str(key)) + ": " + cls.formatValue(item) for key, item in value.items()) + "}"
+        if isinstance(value, str):
+            return '"' + "".join(character if character not in '"\\' and character >= " " else "\\u%04x" % ord(character) for character in value) + '"'
+        return repr(value)
+
+
+    def saveRun(cls, path: str, command: str, duration: float):
+        """Appends counters and timers of a finished command to a file with statistics
+        File which grows over the size limit is trimmed to the last runs, nothing is saved when the file can't be written.
+
+        Args:
+            path (str): Path to file with statistics
+            command (str): Executed command
+            duration (float): Duration of the command in seconds
+        """
+        if not os.path.isdir(os.path.dirname(path)):
+            return
+        run = {"command": command, "finished": int(time.time()), "duration": duration, "counters": cls.counters, "timers": cls.timers}
+        # Statistics are skipped in a read-only folder, the command itself succeeded
+        try:
+            with open(path, "a", encoding="utf-8") as file:
+                file.write(cls.formatValue(run) + "\n")
+                size = file.tell()
+            if size > cls.maxStatsSize:
+                cls.trimRuns(path)
+        except OSError:
+            return
+
+
+    def trimRuns(cls, path: str):
+        """Keeps only the last runs in a file with statistics (replacing the file)
+
+        Args:
+            path (str): Path to file with statistics
+        """
+        import collections
+        from core.Storage import Storage
+        with open(path, "r", encoding="utf-8") as file:
+            runs = collections.deque(file, maxlen=cls.keptRuns)
+        Storage.replaceFile(path, lambda file: file.writelines(run.encode("utf-8") for run in runs), "wb")
+
+
+    def loadRuns(cls, path: str, count: int) -> list:
+        """Loads last runs from a file with statistics
+
+        Args:
+            path (str): Path to file with statistics
+            count (int): Number of runs
+
+        Returns:
+            list: List of runs
+        """
+        import json, collections
+        if not os.path.isfile(path):
+            return []
+        with open(path, "r", encoding="utf-8") as file:
+            return [json.loads(line) for line in collections.deque(file, maxlen=count) if line.strip()]
+
+
+    def summarizeRuns(cls, runs: list) -> list:
+        """Summarizes runs of each command
+
+        Args:
+            runs (list): List of runs
+
+        Returns:
+            list: Data for output
+        """
+        commands = {}
+        for run in runs:
+            name = run["command"].split()[0] if run["command"].strip() else ""
+            commands.setdefault(name, []).append(run)
+        data = []
+        for name, commandRuns in commands.items():
+            durations = [run["duration"] for run in commandRuns]
+            data.append({
+                "command": name,
+                "runs": str(len(commandRuns)),
+                "average (ms)": format(sum(durations) / len(durations) * 1000, ".3f"),
+                "maximum (ms)": format(max(durations) * 1000, ".3f"),
+                "bytes read": str(sum(run["counters"].get("bytes read", 0) for run in commandRuns) // len(commandRuns)),
+                "records parsed": str(sum(run["counters"].get("records parsed", 0) for run in commandRuns) // len(commandRuns)),
+            })
+        return data
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import os
+
+
+class Server(object):
+    """Serves commands over a Unix domain socket, so that loaded timestamps stay in memory between commands
+    Commands are sent on a single line separated by tabs, the server answers with their output and closes the connection.
+    Modules needed only for serving are imported when the server starts, so that sending a request stays fast.
+    """
+
+
+    timeout = 5.0
+
+
+    #########################################################################################
+
+
+    def __init__(self, path: str, execute = None):
+        """Creating server for a socket path
+
+        Args:
+            path (str): Path to the socket file
+            execute (callable, optional): Function executing a single command. Only needed for serving.
+        """
+        self.path = path
+        self.execute = execute
+
+
+    def isSupported(self) -> bool:
+        """Checks if Unix domain sockets are supported on this system
+
+        Returns:
+            bool: Are they supported?
+        """
+        import socket
+        return hasattr(socket, "AF_UNIX")
+
+
+    def isRunning(self) -> bool:
+        """Checks if a server is listening on the socket
+
+        Returns:
+            bool: Is it running?
+        """
+        if not os.path.exists(self.path) or not self.isSupported():
+            return False
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            try:
+                connection.connect(self.path)
+                return True
+            except OSError:
+                return False
+
+
+    #########################################################################################
+
+
+    def serve(self) -> bool:
+        """Serves commands until interrupted
+
+        Returns:
+            bool: Success? (False if the server is already running)
+        """
+        import io, socketserver, contextlib, signal, threading
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            """Handles a single request (list of commands) and sends back their output
+            """
+
+            def handle(self):
+                """Executes received commands while capturing their output
+                """
+                line = self.rfile.readline().decode()
+                # Connections only checking that the server is running don't send anything
+                if not line.strip():
+                    return
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    for command in line.rstrip("\n").split("\t"):
+                        try:
+                            self.server.execute(command)
+                        except SystemExit:
+                            pass
+                self.wfile.write(output.getvalue().encode())
+
+        if self.isRunning():
+            return False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        # Only the current user can connect to the socket
+        umask = os.umask(0o077)
+        try:
+            server = socketserver.UnixStreamServer(self.path, RequestHandler)
+        finally:
+            os.umask(umask)
+        server.execute = self.execute
+        # Stopping the server the same way as with Ctrl+C when it is terminated
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        return True
+
+
+    def request(self, commands: list) -> str:
+        """Sends commands to a running server
+
+        Args:
+            commands (list): List of commands
+
+        Returns:
+            str: Output of the commands or None if no server is running
+        """
+        if not os.path.exists(self.path) or not self.isSupported():
+            return None
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.timeout)
+            try:
+                connection.connect(self.path)
+            except OSError:
+                return None
+            # Timeout only applies to connecting, commands (rebuilding rollup, importing) can take long and can't be repeated locally
+            connection.settimeout(None)
+            connection.sendall(("\t".join(commands) + "\n").encode())
+            chunks = []
+            while True:
+                chunk = connection.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return b"".join(chunks).decode()
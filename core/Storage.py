@@ -0,0 +1,745 @@
+#!/usr/bin/env python3
+import os, sys, array, bisect
+from core.Profiler import Profiler
+
+
+class Storage(object):
+    """Base class of storage backends keeping timestamps in a file
+    Backends read timestamps as an array of epoch seconds (even indexes are START and odd indexes STOP timestamps).
+    Older timestamps can be moved into an archive, the file then only contains timestamps following them.
+    """
+
+
+    name = None
+    offset = 0
+
+
+    #########################################################################################
+
+
+    def __init__(self, path: str):
+        """Creating storage of timestamps in a file
+
+        Args:
+            path (str): Path to the file with timestamps
+        """
+        self.path = path
+
+
+    @staticmethod
+    def replaceFile(path: str, write, mode: str = "w"):
+        """Atomically replaces a file, so that it is never left truncated or half-written
+        Content is written into a temporary file first, which is then renamed to the target path.
+
+        Args:
+            path (str): Path to the file
+            write (callable): Function writing content into an opened file
+            mode (str, optional): Mode for opening the file. Defaults to "w" (text file).
+        """
+        temporary = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            with open(temporary, mode) as file:
+                write(file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.isfile(temporary):
+                os.remove(temporary)
+            raise
+
+
+    @staticmethod
+    def getTailOffset(epochs, count: int = None, since: int = None) -> int:
+        """Returns index of the first timestamp at the end of a history
+        Term crossing the time limit is included as a whole, so the tail starts with a START timestamp.
+
+        Args:
+            epochs (array.array): Epoch seconds of all timestamps
+            count (int, optional): Maximal number of timestamps. Defaults to None (no limit).
+            since (int, optional): Time limit (epoch seconds). Defaults to None (no limit).
+
+        Returns:
+            int: Index of the first timestamp
+        """
+        offset = 0
+        if count is not None:
+            offset = max(offset, len(epochs) - count)
+        if since is not None:
+            first = bisect.bisect_left(epochs, since)
+            offset = max(offset, first - first % 2)
+        return offset
+
+
+    #########################################################################################
+
+
+    def exists(self) -> bool:
+        """Checks if the file with timestamps exists
+
+        Returns:
+            bool: Does the file exist?
+        """
+        return os.path.isfile(self.path)
+
+
+    def create(self):
+        """Creates storage without any timestamps
+        """
+        self.write([])
+
+
+    def delete(self) -> bool:
+        """Removes the file with timestamps
+
+        Returns:
+            bool: Success? (False if there was no file)
+        """
+        if not self.exists():
+            return False
+        os.remove(self.path)
+        return True
+
+
+    def getKey(self) -> tuple:
+        """Returns key identifying current version of stored timestamps (path, inode, size and modification time)
+
+        Returns:
+            tuple: Key or None if the file doesn't exist
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (self.path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+    #########################################################################################
+
+
+    def readEpochs(self) -> array.array:
+        """Reads epoch seconds of all timestamps
+
+        Returns:
+            array.array: Epoch seconds
+        """
+        raise NotImplementedError()
+
+
+    def readLast(self) -> dict:
+        """Reads the last timestamp
+
+        Returns:
+            dict: Last timestamp or None if there are no timestamps
+        """
+        if not self.exists():
+            return None
+        epochs = self.readEpochs()
+        if len(epochs) == 0:
+            return None
+        index = self.offset + len(epochs) - 1
+        return {"id": index + 1, "type": ("start", "stop")[index % 2], "timestamp": epochs[-1]}
+
+
+    def readTail(self, count: int = None, since: int = None) -> tuple:
+        """Reads timestamps at the end of the history
+        Term crossing the time limit is included as a whole, so the tail starts with a START timestamp.
+
+        Args:
+            count (int, optional): Maximal number of timestamps. Defaults to None (no limit).
+            since (int, optional): Time limit (epoch seconds). Defaults to None (no limit).
+
+        Returns:
+            tuple: Index of the first timestamp, epoch seconds of timestamps from that index
+        """
+        if not self.exists():
+            return self.offset, array.array("q")
+        epochs = self.readEpochs()
+        offset = self.getTailOffset(epochs, count, since)
+        return self.offset + offset, epochs[offset:]
+
+
+    def readDays(self, count: int, splitTerms) -> dict:
+        """Calculates time spent for each day inside the storage (if the backend can do it faster than loading all timestamps)
+
+        Args:
+            count (int): Number of timestamps to include
+            splitTerms (callable): Splits terms into day buckets
+
+        Returns:
+            dict: Time spent for each day (keys are dates in ISO format) or None if it is not supported
+        """
+        return None
+
+
+    def write(self, timestamps: list):
+        """Replaces all stored timestamps
+
+        Args:
+            timestamps (list): List of timestamps
+        """
+        raise NotImplementedError()
+
+
+    def append(self, timestamp: dict):
+        """Adds a single timestamp after the last one
+
+        Args:
+            timestamp (dict): Timestamp to add
+        """
+        raise NotImplementedError()
+
+
+class JsonStorage(Storage):
+    """Timestamps saved as a single JSON list, the whole file is rewritten when a timestamp is added
+    """
+
+
+    name = "json"
+
+
+    #########################################################################################
+
+
+    def readTimestamps(self) -> list:
+        """Reads all timestamps
+
+        Returns:
+            list: List of timestamps
+        """
+        import json
+        with Profiler().measure("read"), open(self.path, "r") as file:
+            timestamps = json.load(file)
+            Profiler().count("bytes read", file.tell())
+        Profiler().count("records parsed", len(timestamps))
+        return timestamps
+
+
+    def readEpochs(self) -> array.array:
+        """Reads epoch seconds of all timestamps
+
+        Returns:
+            array.array: Epoch seconds
+        """
+        return array.array("q", (timestamp["timestamp"] for timestamp in self.readTimestamps()))
+
+
+    def write(self, timestamps: list):
+        """Replaces all stored timestamps
+
+        Args:
+            timestamps (list): List of timestamps
+        """
+        import json
+        with Profiler().measure("write"):
+            self.replaceFile(self.path, lambda file: json.dump(timestamps, file, indent=4, sort_keys=False))
+
+
+    def append(self, timestamp: dict):
+        """Adds a single timestamp after the last one (by rewriting the file)
+
+        Args:
+            timestamp (dict): Timestamp to add
+        """
+        timestamps = self.readTimestamps() if self.exists() else []
+        timestamps.append(timestamp)
+        self.write(timestamps)
+
+
+class JournalStorage(Storage):
+    """Timestamps saved in an append-only journal (one JSON object per line)
+    """
+
+
+    name = "journal"
+
+
+    #########################################################################################
+
+
+    def formatLine(self, timestamp: dict) -> str:
+        """Formats a timestamp as a journal line (the same output as json.dumps, without importing json)
+
+        Args:
+            timestamp (dict): Timestamp
+
+        Returns:
+            str: Journal line
+        """
+        return '{"id": %d, "type": "%s", "timestamp": %d}\n' % (timestamp["id"], timestamp["type"], timestamp["timestamp"])
+
+
+    def parseLine(self, line: str) -> dict:
+        """Parses a journal line
+        Lines written by formatLine are parsed directly, other lines using json module.
+
+        Args:
+            line (str): Journal line
+
+        Returns:
+            dict: Timestamp
+        """
+        parts = line.split('"')
+        if len(parts) == 9 and parts[1] == "id" and parts[3] == "type" and parts[7] == "timestamp":
+            try:
+                return {"id": int(parts[2].strip(" :,")), "type": parts[5], "timestamp": int(parts[8].strip(" :}\r\n"))}
+            except ValueError:
+                pass
+        import json
+        return json.loads(line)
+
+
+    #########################################################################################
+
+
+    def readEpochs(self) -> array.array:
+        """Reads epoch seconds of all timestamps
+        Unfinished last line (caused by an interrupted write) is ignored.
+
+        Returns:
+            array.array: Epoch seconds
+        """
+        epochs = array.array("q")
+        with Profiler().measure("read"), open(self.path, "r") as file:
+            for line in file:
+                if not line.endswith("\n"):
+                    break
+                if line.strip():
+                    epochs.append(self.parseLine(line)["timestamp"])
+            Profiler().count("bytes read", os.fstat(file.fileno()).st_size)
+        Profiler().count("records parsed", len(epochs))
+        return epochs
+
+
+    def readReversed(self):
+        """Reads timestamps from the end of the file to its beginning (in blocks, seeking backwards)
+        Unfinished last line (caused by an interrupted write) is ignored.
+
+        Yields:
+            dict: Timestamp
+        """
+        if not self.exists():
+            return
+        with open(self.path, "rb") as file:
+            file.seek(0, os.SEEK_END)
+            position = file.tell()
+            # Beginning of a line which may continue in the previous block
+            beginning = b""
+            unfinished = True
+            while position > 0:
+                size = min(4096, position)
+                position -= size
+                file.seek(position)
+                lines = (file.read(size) + beginning).split(b"\n")
+                Profiler().count("bytes read", size)
+                beginning = lines.pop(0)
+                # Text after the last newline is not a complete line
+                if unfinished and len(lines) > 0:
+                    lines.pop()
+                    unfinished = False
+                for line in reversed(lines):
+                    if line.strip():
+                        Profiler().count("records parsed")
+                        yield self.parseLine(line.decode())
+            if not unfinished and beginning.strip():
+                Profiler().count("records parsed")
+                yield self.parseLine(beginning.decode())
+
+
+    def readLast(self) -> dict:
+        """Reads the last timestamp by seeking from the end of the file
+
+        Returns:
+            dict: Last timestamp or None if the journal is empty
+        """
+        return next(self.readReversed(), None)
+
+
+    def readTail(self, count: int = None, since: int = None) -> tuple:
+        """Reads timestamps at the end of the history by seeking from the end of the file
+        Term crossing the time limit is included as a whole, so the tail starts with a START timestamp.
+
+        Args:
+            count (int, optional): Maximal number of timestamps. Defaults to None (no limit).
+            since (int, optional): Time limit (epoch seconds). Defaults to None (no limit).
+
+        Returns:
+            tuple: Index of the first timestamp, epoch seconds of timestamps from that index
+        """
+        tail = []
+        for timestamp in self.readReversed():
+            if count is not None and len(tail) >= count:
+                break
+            if since is not None and timestamp["timestamp"] < since:
+                # START of a term crossing the time limit
+                if timestamp["type"] == "start":
+                    tail.append(timestamp)
+                break
+            tail.append(timestamp)
+        tail.reverse()
+        return (tail[0]["id"] - 1 if len(tail) > 0 else self.offset), array.array("q", (timestamp["timestamp"] for timestamp in tail))
+
+
+    def write(self, timestamps: list):
+        """Replaces all stored timestamps
+
+        Args:
+            timestamps (list): List of timestamps
+        """
+        def write(file):
+            for timestamp in timestamps:
+                file.write(self.formatLine(timestamp))
+
+        with Profiler().measure("write"):
+            self.replaceFile(self.path, write)
+
+
+    def getCompleteSize(self, file) -> int:
+        """Returns size of complete lines of an opened journal (without unfinished last line), seeking from its end
+
+        Args:
+            file (file): Journal opened in binary mode
+
+        Returns:
+            int: Position after the last newline
+        """
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        while position > 0:
+            size = min(4096, position)
+            position -= size
+            file.seek(position)
+            index = file.read(size).rfind(b"\n")
+            if index >= 0:
+                return position + index + 1
+        return 0
+
+
+    def append(self, timestamp: dict):
+        """Adds a single timestamp to the end of the journal
+
+        Args:
+            timestamp (dict): Timestamp to add
+        """
+        with Profiler().measure("write"), open(self.path, "a+b") as file:
+            # Unfinished line of an interrupted write is removed, otherwise the new line would continue it
+            size = self.getCompleteSize(file)
+            if size < file.tell():
+                file.truncate(size)
+            file.write(self.formatLine(timestamp).encode())
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class SqliteStorage(Storage):
+    """Timestamps saved in an SQLite database (in WAL mode, indexed by time)
+    Adding a timestamp inserts a single row and time for each day can be calculated by the database.
+    """
+
+
+    name = "sqlite"
+
+
+    #########################################################################################
+
+
+    def __init__(self, path: str):
+        """Creating storage of timestamps in a database file, database is opened when it is first used
+
+        Args:
+            path (str): Path to the database file
+        """
+        super().__init__(path)
+        self.connection = None
+        self.pid = None
+
+
+    def connect(self):
+        """Opens the database (again after a fork) and creates the table when it is missing
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        if self.connection is None or self.pid != os.getpid():
+            import sqlite3
+            self.connection = sqlite3.connect(self.path, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=FULL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS timestamps (id INTEGER PRIMARY KEY, type TEXT NOT NULL, timestamp INTEGER NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS timestampIndex ON timestamps (timestamp)")
+            self.pid = os.getpid()
+        return self.connection
+
+
+    def close(self):
+        """Closes the database
+        """
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+
+    def delete(self) -> bool:
+        """Removes the database (including its write-ahead log)
+
+        Returns:
+            bool: Success? (False if there was no database)
+        """
+        self.close()
+        if not self.exists():
+            return False
+        for path in (self.path, self.path + "-wal", self.path + "-shm"):
+            if os.path.isfile(path):
+                os.remove(path)
+        return True
+
+
+    def getKey(self) -> tuple:
+        """Returns key identifying current version of stored timestamps
+        Changes are written to the write-ahead log first, so it is included as well.
+
+        Returns:
+            tuple: Key or None if the database doesn't exist
+        """
+        key = super().getKey()
+        if key is None:
+            return None
+        try:
+            stat = os.stat(self.path + "-wal")
+        except FileNotFoundError:
+            return key
+        return key + (stat.st_size, stat.st_mtime_ns)
+
+
+    #########################################################################################
+
+
+    def readEpochs(self) -> array.array:
+        """Reads epoch seconds of all timestamps
+
+        Returns:
+            array.array: Epoch seconds
+        """
+        with Profiler().measure("read"):
+            epochs = array.array("q", (row[0] for row in self.connect().execute("SELECT timestamp FROM timestamps ORDER BY id")))
+        Profiler().count("records parsed", len(epochs))
+        return epochs
+
+
+    def readLast(self) -> dict:
+        """Reads the last timestamp
+
+        Returns:
+            dict: Last timestamp or None if there are no timestamps
+        """
+        if not self.exists():
+            return None
+        row = self.connect().execute("SELECT id, type, timestamp FROM timestamps ORDER BY id DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        Profiler().count("records parsed")
+        return {"id": row[0], "type": row[1], "timestamp": row[2]}
+
+
+    def readTail(self, count: int = None, since: int = None) -> tuple:
+        """Reads timestamps at the end of the history (found using primary key and index on time)
+        Term crossing the time limit is included as a whole, so the tail starts with a START timestamp.
+
+        Args:
+            count (int, optional): Maximal number of timestamps. Defaults to None (no limit).
+            since (int, optional): Time limit (epoch seconds). Defaults to None (no limit).
+
+        Returns:
+            tuple: Index of the first timestamp, epoch seconds of timestamps from that index
+        """
+        if not self.exists():
+            return self.offset, array.array("q")
+        connection = self.connect()
+        last = connection.execute("SELECT COALESCE(MAX(id), ?) FROM timestamps", (self.offset, )).fetchone()[0]
+        offset = self.offset
+        if count is not None:
+            offset = max(offset, last - count)
+        if since is not None:
+            row = connection.execute("SELECT id FROM timestamps WHERE timestamp >= ? ORDER BY timestamp, id LIMIT 1", (since, )).fetchone()
+            first = last if row is None else row[0] - 1
+            offset = max(offset, first - first % 2)
+        with Profiler().measure("read"):
+            epochs = array.array("q", (row[0] for row in connection.execute("SELECT timestamp FROM timestamps WHERE id > ? ORDER BY id", (offset, ))))
+        Profiler().count("records parsed", len(epochs))
+        return offset, epochs
+
+
+    def readDays(self, count: int, splitTerms) -> dict:
+        """Calculates time spent for each day by the database
+        Terms within a single day are summed by SQL, only terms crossing midnight are split in Python.
+
+        Args:
+            count (int): Number of timestamps to include
+            splitTerms (callable): Splits terms into day buckets
+
+        Returns:
+            dict: Time spent for each day (keys are dates in ISO format)
+        """
+        terms = "SELECT start.timestamp AS start, stop.timestamp AS stop, date(start.timestamp, 'unixepoch', 'localtime') AS startDay, date(stop.timestamp, 'unixepoch', 'localtime') AS stopDay " \
+            "FROM timestamps AS start JOIN timestamps AS stop ON stop.id = start.id + 1 WHERE start.id % 2 = 1 AND stop.id <= ?"
+        days = {}
+        with Profiler().measure("read"):
+            for day, delta in self.connect().execute("SELECT startDay, SUM(stop - start) FROM (" + terms + ") WHERE startDay = stopDay GROUP BY startDay", (count,)):
+                days[day] = delta
+            crossing = [(start, stop) for start, stop in self.connect().execute("SELECT start, stop FROM (" + terms + ") WHERE startDay != stopDay ORDER BY start", (count,))]
+        for firstDate, lastDate, delta in splitTerms(crossing):
+            key = firstDate.isoformat()
+            days[key] = days.get(key, 0) + delta
+        Profiler().count("records parsed", len(days) + len(crossing))
+        return days
+
+
+    def write(self, timestamps: list):
+        """Replaces all stored timestamps in a single transaction
+
+        Args:
+            timestamps (list): List of timestamps
+        """
+        connection = self.connect()
+        with Profiler().measure("write"):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM timestamps")
+                connection.executemany("INSERT INTO timestamps (id, type, timestamp) VALUES (?, ?, ?)", ((timestamp["id"], timestamp["type"], timestamp["timestamp"]) for timestamp in timestamps))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+
+    def append(self, timestamp: dict):
+        """Adds a single timestamp (inserts a single row)
+
+        Args:
+            timestamp (dict): Timestamp to add
+        """
+        with Profiler().measure("write"):
+            self.connect().execute("INSERT INTO timestamps (id, type, timestamp) VALUES (?, ?, ?)", (timestamp["id"], timestamp["type"], timestamp["timestamp"]))
+
+
+class BinaryStorage(Storage):
+    """Timestamps saved as a header followed by epoch seconds packed as little-endian 64-bit integers
+    Types are not saved, even indexes are START and odd indexes STOP timestamps.
+    The file is memory-mapped, so timestamps are read without copying them and adding one writes only 8 bytes.
+    """
+
+
+    name = "binary"
+    header = b"TIMER\x00\x00\x01"
+    recordSize = 8
+
+
+    #########################################################################################
+
+
+    def getCount(self, size: int) -> int:
+        """Returns number of complete records in a file
+        Unfinished last record (caused by an interrupted write) is not counted.
+
+        Args:
+            size (int): File size in bytes
+
+        Returns:
+            int: Number of timestamps
+        """
+        return max(0, (size - len(self.header)) // self.recordSize)
+
+
+    def checkHeader(self, file):
+        """Checks that an opened file starts with the header of binary timestamps
+
+        Args:
+            file (file): File opened in binary mode
+        """
+        file.seek(0)
+        if file.read(len(self.header)) not in (self.header, b""):
+            raise ValueError("File '" + self.path + "' doesn't contain binary timestamps")
+
+
+    #########################################################################################
+
+
+    def readEpochs(self):
+        """Maps epoch seconds of all timestamps into memory
+
+        Returns:
+            memoryview: Epoch seconds (array.array if the file is empty or the system is not little-endian)
+        """
+        import mmap
+        with Profiler().measure("read"), open(self.path, "rb") as file:
+            self.checkHeader(file)
+            count = self.getCount(os.fstat(file.fileno()).st_size)
+            if count == 0:
+                return array.array("q")
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        epochs = memoryview(mapped)[len(self.header):len(self.header) + count * self.recordSize].cast("q")
+        if sys.byteorder != "little":
+            epochs = array.array("q", epochs)
+            epochs.byteswap()
+        Profiler().count("records mapped", count)
+        return epochs
+
+
+    def readLast(self) -> dict:
+        """Reads the last timestamp (only the last 8 bytes of the file)
+
+        Returns:
+            dict: Last timestamp or None if there are no timestamps
+        """
+        if not self.exists():
+            return None
+        with open(self.path, "rb") as file:
+            self.checkHeader(file)
+            count = self.getCount(os.fstat(file.fileno()).st_size)
+            if count == 0:
+                return None
+            file.seek(len(self.header) + (count - 1) * self.recordSize)
+            epoch = int.from_bytes(file.read(self.recordSize), "little", signed=True)
+        Profiler().count("bytes read", self.recordSize)
+        index = self.offset + count - 1
+        return {"id": index + 1, "type": ("start", "stop")[index % 2], "timestamp": epoch}
+
+
+    def write(self, timestamps: list):
+        """Replaces all stored timestamps
+
+        Args:
+            timestamps (list): List of timestamps
+        """
+        epochs = array.array("q", (timestamp["timestamp"] for timestamp in timestamps))
+        if sys.byteorder != "little":
+            epochs.byteswap()
+
+        def write(file):
+            file.write(self.header)
+            epochs.tofile(file)
+
+        with Profiler().measure("write"):
+            self.replaceFile(self.path, write, "wb")
+
+
+    def append(self, timestamp: dict):
+        """Adds a single timestamp by writing 8 bytes at the end of the file
+
+        Args:
+            timestamp (dict): Timestamp to add
+        """
+        if not self.exists():
+            self.write([])
+        with Profiler().measure("write"), open(self.path, "r+b") as file:
+            self.checkHeader(file)
+            # Unfinished record of an interrupted write is overwritten
+            file.seek(len(self.header) + self.getCount(os.fstat(file.fileno()).st_size) * self.recordSize)
+            file.write(timestamp["timestamp"].to_bytes(self.recordSize, "little", signed=True))
+            file.truncate()
+            file.flush()
+            os.fsync(file.fileno())
+
+
+# Storage backends by their names
+backends = {storage.name: storage for storage in (JsonStorage, JournalStorage, SqliteStorage, BinaryStorage)}
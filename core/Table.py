@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+import datetime, math
+
+
+indent = "    "
+dateFormat = "%d.%m.%Y"
+timeFormat = "%H:%M:%S"
+
+
+def datetimeFormat() -> str:
+    """Returns a combination of date and time formats
+
+    Returns:
+        str: Datetime format
+    """
+    return dateFormat + " " + timeFormat
+
+
+#########################################################################################
+
+
+def timeToReadableString(time: int) -> str:
+    """Converts timestamp to readable datetime string
+
+    Args:
+        time (int): Timestamp
+
+    Returns:
+        str: Timestamp converted to readable datetime
+    """
+    return datetime.datetime.fromtimestamp(time).strftime(datetimeFormat())
+
+
+def dateToReadableString(date: datetime.date) -> str:
+    """Converts date to readable date string
+
+    Args:
+        date (int): Date
+
+    Returns:
+        str: Date converted to readable date
+    """
+    return datetime.datetime.combine(date, datetime.time.min).strftime(dateFormat)
+
+
+def deltaToReadableTime(delta: int) -> str:
+    """Converts delta time to readable format
+
+    Args:
+        delta (int): Time delta
+
+    Returns:
+        str: Time delta converted to readable version
+    """
+    hours = delta // 3600
+    minutes = (delta % 3600) // 60
+    seconds = math.floor(delta % 60)
+    return str(int(hours)) + ":" + str(int(minutes)).rjust(2, "0") + ":" + str(int(seconds)).rjust(2, "0")
+
+
+def readableStringToDate(text: str) -> datetime.date:
+    """Converts readable date string to date
+
+    Args:
+        text (str): Date in readable format
+
+    Returns:
+        datetime.date: Date or None if the text is not a valid date
+    """
+    try:
+        return datetime.datetime.strptime(text, dateFormat).date()
+    except ValueError:
+        return None
+
+
+#########################################################################################
+
+
+def prints(text: str):
+    """Prints text with an indent
+
+    Args:
+        text (str): Text to print
+    """
+    print(indent + text)
+
+
+def formatTimestamp(time: int, cache: dict) -> str:
+    """Converts timestamp to readable datetime string, reusing strings of already formatted days and times of day
+    Time of day is calculated from the last local midnight, days which don't have 24 hours (DST changes) are formatted directly.
+
+    Args:
+        time (int): Timestamp
+        cache (dict): Already formatted strings
+
+    Returns:
+        str: Timestamp converted to readable datetime
+    """
+    day = cache.get("day")
+    if day is None or not day[0] <= time < day[1]:
+        date = datetime.datetime.fromtimestamp(time).date()
+        start = int(datetime.datetime.combine(date, datetime.time.min).timestamp())
+        end = int(datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time.min).timestamp())
+        if end - start != 86400 or not start <= time < end:
+            return timeToReadableString(time)
+        day = cache["day"] = (start, end, dateToReadableString(date) + " ")
+    seconds = time - day[0]
+    clock = cache.get(seconds)
+    if clock is None:
+        if timeFormat == "%H:%M:%S":
+            clock = "%02d:%02d:%02d" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+        else:
+            clock = datetime.time(seconds // 3600, seconds // 60 % 60, seconds % 60).strftime(timeFormat)
+        cache[seconds] = clock
+    return day[2] + clock
+
+
+def processRow(row: dict, cache: dict) -> dict:
+    """Processes a single row into a more readable version
+    Repeated dates and times of day are formatted only once.
+
+    Args:
+        row (dict): Row to be processed (it is not modified)
+        cache (dict): Already formatted strings
+
+    Returns:
+        dict: Processed row
+    """
+    row = dict(row)
+    # Spcific fields
+    if "month" in row and row["month"] != "":
+        row["month"] = row["month"].strftime("%B %Y")
+    if "year" in row and row["year"] != "":
+        row["year"] = row["year"].strftime("%Y")
+    if "time" in row and row["time"] != "":
+        row["hours"] = round(row["time"] / 3600, 3)
+        if row["hours"] % 1 >= 0.75:
+            row["rounded"] = row["hours"] - row["hours"] % 1 + 1
+        elif row["hours"] % 1 >= 0.25:
+            row["rounded"] = row["hours"] - row["hours"] % 1 + 0.5
+        else:
+            row["rounded"] = row["hours"] - row["hours"] % 1
+        row["time"] = deltaToReadableTime(row["time"])
+        row["hours"] = format(row["hours"], ".3f")
+    # Common fields
+    for key, value in row.items():
+        if type(value) == datetime.date:
+            if value not in cache:
+                cache[value] = dateToReadableString(value)
+            row[key] = cache[value]
+        elif type(value) == int and key != "id":
+            row[key] = formatTimestamp(value, cache)
+    return row
+
+
+def selectCorrectFieldJustification(type: str, value, length: int) -> str:
+    """Creates a new string with the correct justification based on field type
+
+    Args:
+        type (str): Field type (name)
+        value (mixed): Value
+        length (int): Desired length of string
+
+    Returns:
+        str: New, justifed string
+    """
+    if type in ("time", "hours", "rounded"):
+        value = value.rjust(length)
+    return value.ljust(length + 3)
+
+
+def printTable(data, result: dict = None, limit: int = None, offset: int = 0):
+    """Prettyprints data in a table
+    Rows are formatted lazily (only rows within limit and offset), repeated strings are reused and lines are written in buffered chunks.
+
+    Args:
+        data (iterable): Objects (list or generator)
+        result (dict): Object with result data
+        limit (int, optional): Maximal number of printed objects. Defaults to None (all of them).
+        offset (int, optional): Number of skipped objects. Defaults to 0.
+    """
+    import itertools, sys
+    cache = {}
+    rows = itertools.islice(data, offset, None if limit is None else offset + limit)
+    # Formatting rows, original data (which can be cached) is not changed
+    headers = None
+    lengths = None
+    cells = []
+    rounded = 0
+    for original in itertools.chain(rows, [] if result is None else [result]):
+        row = processRow(original, cache)
+        if headers is None:
+            headers = list(row.keys())
+            lengths = [len(header) for header in headers]
+        if original is not result and "rounded" in row:
+            rounded += row["rounded"]
+        cells.append((type(row.get("id", 0)) is not int, [str(value) for value in row.values()]))
+    if len(cells) == (0 if result is None else 1):
+        prints("No data found.")
+        return
+    # Result row sums rounded hours of rows
+    if result is not None and result.get("id") == "TOTAL" and "rounded" in headers:
+        cells[-1][1][headers.index("rounded")] = str(rounded)
+    for i, column in enumerate(zip(*(values for separated, values in cells))):
+        lengths[i] = max(lengths[i], max(map(len, column)))
+    # Showing headers, divider and data
+    divider = indent + (sum(lengths) + (len(lengths) -1) * 3) * "-" + "\n"
+    lines = [indent + "".join(header.upper().ljust(lengths[i] + 3) for i, header in enumerate(headers)) + "\n", divider]
+    line = indent + "".join(("{:>%d}   " if header in ("time", "hours", "rounded") else "{:<%d}") % (lengths[i] + (0 if header in ("time", "hours", "rounded") else 3)) for i, header in enumerate(headers)) + "\n"
+    for separated, values in cells:
+        if separated:
+            lines.append(divider)
+        lines.append(line.format(*values))
+        if len(lines) >= 1000:
+            sys.stdout.write("".join(lines))
+            lines = []
+    sys.stdout.write("".join(lines))
@@ -1,28 +1,95 @@
 #!/usr/bin/env python3
-import os, shutil, json, time, datetime, calendar
+import os, time, datetime, bisect, array, itertools, heapq
+from core.Profiler import Profiler
+from core.Lock import Lock
+from core.Storage import Storage, backends
 
 
 class Timer(object):
-    """Singleton for timer functions
+    """Registry of timers (one instance for each timer name, the default timer has no name)
+    Named timers keep timestamps in their own folders inside the default timestamps folder, each with its own caches.
     """
 
 
     folderName = "timestamps"
+    timersName = "timers"
+    timerName = None
+    reservedNames = ("all", "default")
     fileName = "timestamps.json"
+    journalName = "timestamps.jsonl"
+    databaseName = "timestamps.sqlite"
+    binaryName = "timestamps.bin"
+    archiveName = "archive"
+    manifestName = "manifest.tsv"
+    configName = "storage.txt"
+    defaultStorage = "journal"
+    storage = None
+    manifestKey = None
+    rollupName = "days.json"
+    statsName = "stats.jsonl"
+    socketName = "timer.sock"
+    lockName = "timestamps.lock"
+    jobs = 1
+    chunkSize = None
+    vectorize = True
+    readOnly = False
     
 
     #########################################################################################
 
 
-    def __new__(cls):
-        """Creating class instance
+    def __new__(cls, name: str = None):
+        """Creating class instance (or returning existing instance of the same timer)
+
+        Args:
+            name (str, optional): Timer name. Defaults to None (default timer).
 
         Returns:
             Timer: Timer class instance
         """
-        if not hasattr(cls, 'instance'):
-            cls.instance = super(Timer, cls).__new__(cls)
-        return cls.instance
+        if not hasattr(cls, 'instances'):
+            cls.instances = {}
+        if name not in cls.instances:
+            if name is not None and not cls.isValidName(name):
+                raise ValueError("Invalid timer name: " + name)
+            instance = super(Timer, cls).__new__(cls)
+            instance.timerName = name
+            cls.instances[name] = instance
+        return cls.instances[name]
+
+
+    @staticmethod
+    def isValidName(name: str) -> bool:
+        """Checks if a timer name can be used (as a folder name)
+        Reserved names ("all" for all timers, "default" for the column of the default timer) can't be used.
+
+        Args:
+            name (str): Timer name
+
+        Returns:
+            bool: Is it valid?
+        """
+        return name not in Timer.reservedNames and len(name) > 0 and all(character.isalnum() or character in "-_." for character in name) and not name.startswith(".")
+
+
+    def getTimersPath(cls) -> str:
+        """Returns path to folder with named timers (inside the default timestamps folder)
+
+        Returns:
+            str: Folder path
+        """
+        return os.path.join(Timer().getFolderPath(), cls.timersName)
+
+
+    def getTimerNames(cls) -> list:
+        """Returns names of all named timers
+
+        Returns:
+            list: Timer names in alphabetical order
+        """
+        if not os.path.isdir(cls.getTimersPath()):
+            return []
+        return sorted(name for name in os.listdir(cls.getTimersPath()) if cls.isValidName(name) and os.path.isdir(os.path.join(cls.getTimersPath(), name)))
     
 
     #########################################################################################
@@ -34,6 +101,8 @@ class Timer(object):
         Returns:
             str: Folder path
         """
+        if cls.timerName is not None:
+            return os.path.join(cls.getTimersPath(), cls.timerName)
         return os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, cls.folderName))
     
 
@@ -53,7 +122,7 @@ class Timer(object):
             bool: Success?
         """
         if not cls.folderExists():
-            os.mkdir(cls.getFolderPath())
+            os.makedirs(cls.getFolderPath())
             return True
         return False
     
@@ -64,6 +133,7 @@ class Timer(object):
         Returns:
             bool: Success?
         """
+        import shutil
         if cls.folderExists():
             shutil.rmtree(cls.getFolderPath())
             return True
@@ -73,8 +143,41 @@ class Timer(object):
     #########################################################################################
     
 
+    def useFolder(cls, folderName: str, readOnly: bool = False):
+        """Switches to another timestamps folder until the end of a with block
+        Read-only folder is never changed (timestamps aren't migrated, lock and rollup aren't saved).
+
+        Args:
+            folderName (str): Folder name (or path)
+            readOnly (bool, optional): Only read the folder? Defaults to False.
+
+        Returns:
+            contextmanager: Context manager
+        """
+        import contextlib
+
+        @contextlib.contextmanager
+        def switch():
+            previous = (cls.folderName, cls.readOnly)
+            cls.folderName, cls.readOnly = folderName, readOnly
+            try:
+                yield cls
+            finally:
+                cls.folderName, cls.readOnly = previous
+        return switch()
+
+
     def getFilePath(cls) -> str:
-        """Returns path to timestamps file
+        """Returns path to timestamps file (depending on the selected storage)
+
+        Returns:
+            str: Absolute file path
+        """
+        return cls.getStorage().path
+    
+
+    def getJsonPath(cls) -> str:
+        """Returns path to JSON timestamps file
 
         Returns:
             str: Absolute file path
@@ -82,13 +185,110 @@ class Timer(object):
         return os.path.join(cls.getFolderPath(), cls.fileName)
     
 
+    def getJournalPath(cls) -> str:
+        """Returns path to append-only timestamps journal
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getFolderPath(), cls.journalName)
+    
+
+    def getDatabasePath(cls) -> str:
+        """Returns path to SQLite database with timestamps
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getFolderPath(), cls.databaseName)
+    
+
+    def getBinaryPath(cls) -> str:
+        """Returns path to binary file with timestamps
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getFolderPath(), cls.binaryName)
+    
+
+    def getArchivePath(cls) -> str:
+        """Returns path to folder with archived segments of timestamps
+
+        Returns:
+            str: Absolute folder path
+        """
+        return os.path.join(cls.getFolderPath(), cls.archiveName)
+    
+
+    def getManifestPath(cls) -> str:
+        """Returns path to list of archived segments
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getArchivePath(), cls.manifestName)
+    
+
+    def getConfigPath(cls) -> str:
+        """Returns path to file with name of the selected storage
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getFolderPath(), cls.configName)
+    
+
+    def getStatsPath(cls) -> str:
+        """Returns path to file with statistics of executed commands
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getFolderPath(), cls.statsName)
+    
+
+    def getSocketPath(cls) -> str:
+        """Returns path to socket of a running server
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getFolderPath(), cls.socketName)
+    
+
+    def getLockPath(cls) -> str:
+        """Returns path to file locked while timestamps are modified
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getFolderPath(), cls.lockName)
+    
+
+    def lock(cls) -> Lock:
+        """Returns lock of timestamps shared by all processes, timestamps should only be modified while holding it
+
+        Returns:
+            Lock: Lock (usable in a with statement)
+        """
+        if not cls.folderExists():
+            cls.createFolder()
+        if not hasattr(cls, "locks"):
+            cls.locks = {}
+        return cls.locks.setdefault(cls.getLockPath(), Lock(cls.getLockPath()))
+    
+
     def fileExists(cls) -> bool:
         """Checks if there is a file for timestamps
+        In journal mode a JSON file waiting for migration counts as well.
 
         Returns:
             bool: Does the file exist?
         """
-        return os.path.isfile(cls.getFilePath())
+        if cls.getStorageName() == "journal" and os.path.isfile(cls.getJsonPath()):
+            return True
+        return cls.getStorage().exists()
     
 
     def createFile(cls) -> bool:
@@ -100,14 +300,13 @@ class Timer(object):
         if not cls.folderExists():
             cls.createFolder()
         if not cls.fileExists():
-            with open(cls.getFilePath(), 'w'):
-                pass
+            cls.getStorage().create()
             return True
         return False
     
 
     def deleteFile(cls) -> bool:
-        """Removing timestamp file
+        """Removing timestamp file (both journal and JSON file waiting for migration in journal mode)
 
         Returns:
             bool: Success?
@@ -115,7 +314,11 @@ class Timer(object):
         if not cls.folderExists():
             return False
         if cls.fileExists():
-            os.remove(cls.getFilePath())
+            cls.getStorage().delete()
+            if cls.getStorageName() == "journal" and os.path.isfile(cls.getJsonPath()):
+                os.remove(cls.getJsonPath())
+            cls.deleteRollup()
+            cls.deleteArchive()
             return True
         else:
             return False
@@ -124,296 +327,1609 @@ class Timer(object):
     #########################################################################################
 
 
-    def loadTimestamps(cls) -> list:
-        """Attempts to load list of timestamps
+    def getStorageName(cls) -> str:
+        """Returns name of the selected storage (saved in the timestamps folder, journal by default)
 
         Returns:
-            list: List of timestamps
+            str: Storage name
         """
-        if not cls.folderExists():
-            cls.createFolder()
-        if cls.fileExists():
-            return json.load(open(cls.getFilePath(), "r"))
-        else:
-            timestamps = []
-            cls.saveTimestamps(timestamps)
-            return timestamps
+        if cls.storage is not None:
+            return cls.storage
+        try:
+            stat = os.stat(cls.getConfigPath())
+        except FileNotFoundError:
+            return cls.defaultStorage
+        key = (cls.getConfigPath(), stat.st_mtime_ns)
+        if key != getattr(cls, "configKey", None):
+            with open(cls.getConfigPath(), "r") as file:
+                cls.configStorage = file.read().strip()
+            cls.configKey = key
+        return cls.configStorage
+
+
+    def getStorage(cls, name: str = None) -> Storage:
+        """Returns storage backend for timestamps in the current folder
 
+        Args:
+            name (str, optional): Storage name. Defaults to None (selected storage).
 
-    def saveTimestamps(cls, timestamps: list) -> bool:
-        """Attempts to save list of timestamps
+        Returns:
+            Storage: Storage backend
+        """
+        if name is None:
+            name = cls.getStorageName()
+            # JSON file waiting for migration is read directly from a read-only folder
+            if cls.readOnly and name == "journal" and not os.path.isfile(cls.getJournalPath()) and os.path.isfile(cls.getJsonPath()):
+                name = "json"
+        paths = {"json": cls.getJsonPath, "journal": cls.getJournalPath, "sqlite": cls.getDatabasePath, "binary": cls.getBinaryPath}
+        if name not in paths:
+            raise ValueError("Unknown storage '" + name + "'")
+        if not hasattr(cls, "storages"):
+            cls.storages = {}
+        path = paths[name]()
+        if (name, path) not in cls.storages:
+            cls.storages[(name, path)] = backends[name](path)
+        storage = cls.storages[(name, path)]
+        storage.offset = cls.getArchivedCount()
+        return storage
+
+
+    def migrateStorage(cls, name: str) -> bool:
+        """Moves all timestamps into another storage and selects it
+        Files of the previous storage are removed after the timestamps are saved.
 
         Args:
-            timestamps (list): List of timestamps to save
+            name (str): Storage name
 
         Returns:
-            bool: Success?
+            bool: Success? (False if the storage is already selected)
         """
-        if not cls.folderExists():
-            cls.createFolder()
-        json.dump(timestamps, open(cls.getFilePath(), "w"), indent=4, sort_keys=False)
+        target = cls.getStorage(name)
+        with cls.lock():
+            if name == cls.getStorageName():
+                return False
+            source = cls.getStorage()
+            # Archived timestamps stay in the archive
+            target.write(cls.fromEpochs(source.readEpochs(), source.offset) if source.exists() else [])
+            Storage.replaceFile(cls.getConfigPath(), lambda file: file.write(name + "\n"))
+            if cls.storage is not None:
+                cls.storage = name
+            source.delete()
+            if source.name == "journal" and name != "json" and os.path.isfile(cls.getJsonPath()):
+                os.remove(cls.getJsonPath())
+        cls.snapshotKey = None
+        return True
+
+
+    def migrateToJournal(cls) -> bool:
+        """Converts existing JSON timestamps file into a journal
+        The JSON file is kept in place as a backup.
+
+        Returns:
+            bool: Success? (False if there was nothing to migrate)
+        """
+        if cls.readOnly or cls.getStorageName() != "journal" or os.path.isfile(cls.getJournalPath()) or not os.path.isfile(cls.getJsonPath()):
+            return False
+        with cls.lock():
+            # Another process could have migrated the file while waiting for the lock
+            if os.path.isfile(cls.getJournalPath()):
+                return False
+            cls.getStorage().write(cls.getStorage("json").readTimestamps())
         return True
     
 
     #########################################################################################
 
 
-    def startTimestamp(cls) -> bool:
-        """Attempts to add a start timestamp
+    def loadSegments(cls) -> list:
+        """Loads list of archived segments (closed periods moved out of the timestamps file)
+        List is only read when it changed since the last load.
 
         Returns:
-            bool: Success?
+            list: Segments (name, offset and count of timestamps, time of the first and the last timestamp) in chronological order
         """
-        timestamps = cls.loadTimestamps()
-        if len(timestamps) % 2 == 0:
-            timestamps.append({"id": len(timestamps) + 1, "type": "start", "timestamp": int(time.time())})
-            Timer().saveTimestamps(timestamps)
-            return True
-        else:
-            return False
+        try:
+            stat = os.stat(cls.getManifestPath())
+        except FileNotFoundError:
+            cls.segments = []
+            cls.manifestKey = None
+            return cls.segments
+        key = (cls.getManifestPath(), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if key != getattr(cls, "manifestKey", None):
+            segments = []
+            with open(cls.getManifestPath(), "r") as file:
+                for line in list(file)[1:]:
+                    name, offset, count, first, last = line.split()
+                    segments.append({"name": name, "offset": int(offset), "count": int(count), "first": int(first), "last": int(last)})
+            cls.segments = segments
+            cls.manifestKey = key
+        return cls.segments
+
+
+    def saveSegments(cls, segments: list):
+        """Saves list of archived segments
+
+        Args:
+            segments (list): Segments
+        """
+        def write(file):
+            file.write("name\toffset\tcount\tfirst\tlast\n")
+            for segment in segments:
+                file.write("%s\t%d\t%d\t%d\t%d\n" % (segment["name"], segment["offset"], segment["count"], segment["first"], segment["last"]))
 
+        if not os.path.isdir(cls.getArchivePath()):
+            os.mkdir(cls.getArchivePath())
+        Storage.replaceFile(cls.getManifestPath(), write)
 
-    def stopTimestamp(cls) -> bool:
-        """Attempts to add a stop timestamp
+
+    def getArchivedCount(cls) -> int:
+        """Returns number of archived timestamps (which precede timestamps in the timestamps file)
 
         Returns:
-            bool: Success?
+            int: Number of timestamps
         """
-        timestamps = cls.loadTimestamps()
-        if len(timestamps) % 2 == 1:
-            timestamps.append({"id": len(timestamps) + 1, "type": "stop", "timestamp": int(time.time())})
-            Timer().saveTimestamps(timestamps)
-            return True
-        else:
-            return False
-    
+        segments = cls.loadSegments()
+        return segments[-1]["offset"] + segments[-1]["count"] if len(segments) > 0 else 0
 
-    #########################################################################################
 
+    def getSegmentStorage(cls, segment: dict) -> Storage:
+        """Returns storage with raw timestamps of an archived segment (always a journal)
+
+        Args:
+            segment (dict): Segment
+
+        Returns:
+            Storage: Storage backend
+        """
+        return backends["journal"](os.path.join(cls.getArchivePath(), segment["name"] + ".jsonl"))
 
-    def getTimestampsBetweenDates(cls, timestamps: list, firstDate: datetime.date, lastDate: datetime.date = None) -> list:
-        """Attempts to get list of timestamps between two dates
+
+    def getSummaryPath(cls, segment: dict) -> str:
+        """Returns path to file with time spent for each day of an archived segment
 
         Args:
-            timestamps (list): List of timestamps
-            firstDate (datetime.date): First date
-            lastDate (datetime.date, optional): Last date. Defaults to None.
+            segment (dict): Segment
 
         Returns:
-            list: Found timestamps between dates
+            str: Absolute file path
         """
-        timestampsBetweenDates = []
-        if lastDate is None:
-            lastDate = firstDate
-        firstDateTimestamp = int(datetime.datetime.timestamp(datetime.datetime.combine(firstDate, datetime.time.min)))
-        lastDateTimestamp = int(datetime.datetime.timestamp(datetime.datetime.combine(lastDate, datetime.time.min) + datetime.timedelta(days=1)))
-        # Getting timestamps between dates
-        beforeTimestamp = None
-        for timestamp in timestamps:
-            if timestamp["timestamp"] < firstDateTimestamp and (beforeTimestamp is None or timestamp["timestamp"] > beforeTimestamp["timestamp"]):
-                beforeTimestamp = timestamp
-            if timestamp["timestamp"] >= firstDateTimestamp and timestamp["timestamp"] <= lastDateTimestamp:
-                timestampsBetweenDates.append(timestamp)
-        # Adding additional timestamps
-        if beforeTimestamp is not None and beforeTimestamp["type"] == "start":
-            if len(timestampsBetweenDates) == 0 or timestampsBetweenDates[0]["type"] == "stop":
-                timestampsBetweenDates.insert(0, {"id": "", "type": "start", "timestamp": firstDateTimestamp})
-        if len(timestampsBetweenDates) > 0 and timestampsBetweenDates[-1]["type"] == "start":
-            if timestampsBetweenDates[-1] == timestamps[-1] or int(time.time()) < lastDateTimestamp:
-                timestampsBetweenDates.append({"id": "", "type": "stop", "timestamp": int(time.time())})
-            else:
-                timestampsBetweenDates.append({"id": "", "type": "stop", "timestamp": lastDateTimestamp})
-        #print(timestampsBetweenDates)
-        return timestampsBetweenDates
-    
+        return os.path.join(cls.getArchivePath(), segment["name"] + ".days.json")
 
-    #########################################################################################
 
+    def loadSegmentEpochs(cls, segment: dict) -> array.array:
+        """Loads raw timestamps of an archived segment
+
+        Args:
+            segment (dict): Segment
+
+        Returns:
+            array.array: Epoch seconds
+        """
+        Profiler().count("segments read")
+        return cls.getSegmentStorage(segment).readEpochs()
 
-    def calculateTerms(cls, timestamps: list) -> tuple:
-        """Calculates time spent between timestamps
-        List of timestamps should start with a START timestamp.
+
+    def loadSegmentDays(cls, segment: dict) -> dict:
+        """Loads time spent for each day of an archived segment (without reading its timestamps)
 
         Args:
-            timestamps (list): List of timestamps
+            segment (dict): Segment
 
         Returns:
-            tuple: Data for output, total time spent
+            dict: Time spent for each day (keys are dates in ISO format)
         """
-        data = []
-        total = 0
-        for i in range(0, len(timestamps), 2):
-            start = timestamps[i]["timestamp"]
-            # Checking if timestamp list ends with a STOP timestamp, otherwise making a new one
-            if (i + 1) < len(timestamps):
-                stop = timestamps[i+1]["timestamp"]
-            else:
-                stop = int(time.time())
-            # Calculating time
-            delta = stop - start
-            total += delta
-            data.append({"id": int(i/2 + 1), "start": start, "stop": stop, "time": delta})
-        return data, {"id": "SUM", "start": "", "stop": "", "time": total}
+        import json
+        with Profiler().measure("read"), open(cls.getSummaryPath(segment), "r") as file:
+            days = json.load(file)
+            Profiler().count("bytes read", file.tell())
+        return days
 
 
-    def calculateDays(cls, timestamps: list) -> tuple:
-        """Calculates time spent for each day
-        List of timestamps should start with a START timestamp.
+    def saveSegment(cls, segment: dict, epochs: array.array):
+        """Saves raw timestamps of an archived segment and time spent for each of its days
 
         Args:
-            timestamps (list): List of timestamps
+            segment (dict): Segment
+            epochs (array.array): Epoch seconds of the segment timestamps
+        """
+        import json
+        if not os.path.isdir(cls.getArchivePath()):
+            os.mkdir(cls.getArchivePath())
+        cls.getSegmentStorage(segment).write(cls.fromEpochs(epochs, segment["offset"]))
+        days = {firstDate.isoformat(): delta for firstDate, lastDate, delta in cls.calculateBuckets(epochs, cls.getDayBucket)}
+        Storage.replaceFile(cls.getSummaryPath(segment), lambda file: json.dump(days, file, sort_keys=True))
+
+
+    def deleteSegments(cls, count: int):
+        """Removes archived segments which don't fit into the first timestamps
+
+        Args:
+            count (int): Number of timestamps which stay archived (at most)
 
         Returns:
-            tuple: Data for output, total time spent
+            list: Remaining segments
         """
-        data = []
-        total = 0
-        if len(timestamps) > 0:
-            # Getting first and last dates
-            first = timestamps[0]["timestamp"]
-            if timestamps[-1]["type"] == "start":
-                timestamps.append({"id": "", "type": "stop", "timestamp": int(time.time())})
-            last = timestamps[-1]["timestamp"]
-            firstDate = datetime.datetime.fromtimestamp(first).date()
-            lastDate = datetime.datetime.fromtimestamp(last).date()
-            # Looping through each day
-            for i in range((lastDate - firstDate).days + 1):
-                currentDate = firstDate + datetime.timedelta(days=i)
-                timestampsBetweenDates = cls.getTimestampsBetweenDates(timestamps, currentDate)
-                termsData, termsResult = cls.calculateTerms(timestampsBetweenDates)
-                if termsResult["time"] > 0:
-                    total += termsResult["time"]
-                    data.append({"id": len(data) +1, "date": currentDate, "time": termsResult["time"]})
-        return data, {"id": "SUM", "date": "", "time": total}
+        segments = cls.loadSegments()
+        remaining = [segment for segment in segments if segment["offset"] + segment["count"] <= count]
+        for segment in segments[len(remaining):]:
+            for path in (cls.getSegmentStorage(segment).path, cls.getSummaryPath(segment)):
+                if os.path.isfile(path):
+                    os.remove(path)
+        if len(remaining) < len(segments):
+            cls.saveSegments(remaining)
+        return remaining
 
 
-    def calculateToday(cls, timestamps: list) -> tuple:
-        """Calculates time spent for each day
-        List of timestamps should start with a START timestamp.
+    def deleteArchive(cls) -> bool:
+        """Removes all archived segments
+
+        Returns:
+            bool: Success? (False if there was no archive)
+        """
+        if not os.path.isdir(cls.getArchivePath()):
+            return False
+        cls.deleteSegments(0)
+        if os.path.isfile(cls.getManifestPath()):
+            os.remove(cls.getManifestPath())
+        os.rmdir(cls.getArchivePath())
+        return True
+
+
+    def getPeriod(cls, date: datetime.date, period: str) -> str:
+        """Returns name of a period (year or month) containing a date
 
         Args:
-            timestamps (list): List of timestamps
+            date (datetime.date): Date
+            period (str): "year" or "month"
 
         Returns:
-            tuple: Data for output, total time spent
+            str: Period name (for example "2024" or "2024-05")
         """
-        currentDate = datetime.datetime.fromtimestamp(time.time()).date()
-        timestampsBetweenDates = cls.getTimestampsBetweenDates(timestamps, currentDate)
-        termsData, termsResult = cls.calculateTerms(timestampsBetweenDates)
-        data = [{"id": 1, "date": currentDate, "time": termsResult["time"]}, ]
-        return data, {"id": "SUM", "date": currentDate, "time": termsResult["time"]}
+        return date.strftime("%Y" if period == "year" else "%Y-%m")
 
 
-    def calculateMonths(cls, timestamps: list) -> tuple:
-        """Calculates time spent for each month
-        List of timestamps should start with a START timestamp.
+    def compact(cls, period: str = "year") -> int:
+        """Moves closed periods (years or months before the current one) into archived segments
+        Each segment keeps raw timestamps and time spent for each day, only the current period stays in the timestamps file.
+        Segments always end with a STOP timestamp, term crossing the start of the current period stays in the file.
 
         Args:
-            timestamps (list): List of timestamps
+            period (str, optional): "year" or "month". Defaults to "year".
 
         Returns:
-            tuple: Data for output, total time spent
+            int: Number of archived timestamps
         """
-        data = []
-        total = 0
-        if len(timestamps) > 0:
-            # Getting first and last dates
-            first = timestamps[0]["timestamp"]
-            if timestamps[-1]["type"] == "start":
-                timestamps.append({"id": "", "type": "stop", "timestamp": int(time.time())})
-            last = timestamps[-1]["timestamp"]
-            firstMonthDate = datetime.datetime.fromtimestamp(first).date().replace(day=1)
-            lastMonthDate = datetime.datetime.fromtimestamp(last).date().replace(day=1)
-            # Looping through each month
-            currentMonthDate = firstMonthDate
-            while True:
-                # Getting next month
-                nextMonth = calendar._nextmonth(currentMonthDate.year, currentMonthDate.month)
-                nextMonthDate = datetime.datetime(nextMonth[0], nextMonth[1], 1).date()
-                # Calculating time in months
-                timestampsBetweenDates = cls.getTimestampsBetweenDates(timestamps, currentMonthDate, nextMonthDate - datetime.timedelta(days=1))
-                termsData, termsResult = cls.calculateTerms(timestampsBetweenDates)
-                if termsResult["time"] > 0:
-                    total += termsResult["time"]
-                    data.append({"id": len(data) +1, "month": currentMonthDate, "time": termsResult["time"]})
-                # Switching to next month
-                if datetime.datetime.timestamp(datetime.datetime.combine(currentMonthDate, datetime.time.min)) >= datetime.datetime.timestamp(datetime.datetime.combine(lastMonthDate, datetime.time.min)):
-                    break
-                currentMonthDate = nextMonthDate
-        return data, {"id": "SUM", "month": "", "time": total}
+        with cls.lock():
+            epochs = cls.loadEpochs()
+            archived = cls.getArchivedCount()
+            today = datetime.date.today()
+            periodStart = today.replace(month=1, day=1) if period == "year" else today.replace(day=1)
+            cut = Storage.getTailOffset(epochs, since=int(datetime.datetime.timestamp(datetime.datetime.combine(periodStart, datetime.time.min))))
+            if cut <= archived:
+                return 0
+            segments = list(cls.loadSegments())
+            # Terms belong to the period of their START timestamp
+            start = archived
+            while start < cut:
+                name = cls.getPeriod(datetime.datetime.fromtimestamp(epochs[start]).date(), period)
+                end = start + 2
+                while end < cut and cls.getPeriod(datetime.datetime.fromtimestamp(epochs[end]).date(), period) == name:
+                    end += 2
+                # Term left in the file by the previous compaction can belong to the last segment
+                if len(segments) > 0 and segments[-1]["name"] == name:
+                    segments[-1]["count"] += end - start
+                else:
+                    segments.append({"name": name, "offset": start, "count": end - start})
+                segment = segments[-1]
+                segment["first"] = epochs[segment["offset"]]
+                segment["last"] = epochs[end - 1]
+                cls.saveSegment(segment, epochs[segment["offset"]:end])
+                start = end
+            # Segments are saved before timestamps are removed from the file, so an interruption can't lose any
+            cls.saveSegments(segments)
+            remaining = cls.fromEpochs(epochs[cut:], cut)
+            cls.getStorage().write(remaining)
+            cls.cacheSnapshot(array.array("q", epochs))
+        return cut - archived
 
 
-    def calculateWeeks(cls, timestamps: list) -> tuple:
-        """Calculates time spent for each week
-        List of timestamps should start with a START timestamp.
+    #########################################################################################
+
+
+    def getFileKey(cls) -> tuple:
+        """Returns key identifying current version of timestamps file (path, inode, size and modification time of the storage)
+
+        Archived segments are a part of the key, so the key also changes after compaction.
+
+        Returns:
+            tuple: File key or None if the file doesn't exist
+        """
+        key = cls.getStorage().getKey()
+        if key is None or cls.manifestKey is None:
+            return key
+        return key + cls.manifestKey
+
+
+    def isEpochs(cls, timestamps) -> bool:
+        """Checks if timestamps are in compact representation (array of epoch seconds or memory-mapped file)
 
         Args:
-            timestamps (list): List of timestamps
+            timestamps (list): List of timestamps (or array of epoch seconds)
 
         Returns:
-            tuple: Data for output, total time spent
+            bool: Are they epoch seconds?
         """
-        data = []
-        total = 0
-        if len(timestamps) > 0:
-            # Getting first and last dates
-            first = timestamps[0]["timestamp"]
-            if timestamps[-1]["type"] == "start":
-                timestamps.append({"id": "", "type": "stop", "timestamp": int(time.time())})
-            last = timestamps[-1]["timestamp"]
-            firstDate = datetime.datetime.fromtimestamp(first).date()
-            lastDate = datetime.datetime.fromtimestamp(last).date()
-            firstWeekDate = firstDate - datetime.timedelta(days=firstDate.weekday())
-            lastWeekDate = lastDate - datetime.timedelta(days=lastDate.weekday())
-            # Looping through each week
-            currentWeekDate = firstWeekDate
-            for i in range(int((lastWeekDate - firstWeekDate).days / 7) + 1):
-                # Getting next month
-                nextWeekDate = currentWeekDate + datetime.timedelta(days=7)
-                # Calculating time in months
-                currentWeekEndDate = nextWeekDate - datetime.timedelta(days=1)
-                timestampsBetweenDates = cls.getTimestampsBetweenDates(timestamps, currentWeekDate, currentWeekEndDate)
-                termsData, termsResult = cls.calculateTerms(timestampsBetweenDates)
-                if termsResult["time"] > 0:
-                    total += termsResult["time"]
-                    data.append({"id": len(data) +1, "monday": currentWeekDate, "sunday": currentWeekEndDate, "time": termsResult["time"]})
-                # Switching to next week
-                currentWeekDate = nextWeekDate
-        return data, {"id": "SUM", "monday": "", "sunday": "", "time": total}
+        return isinstance(timestamps, (array.array, memoryview))
 
 
-    def calculateYears(cls, timestamps: list) -> tuple:
-        """Calculates time spent for each year
-        List of timestamps should start with a START timestamp.
+    def toEpochs(cls, timestamps) -> array.array:
+        """Converts timestamps to compact representation (array of epoch seconds)
+        Timestamp types are not stored, even indexes are START and odd indexes STOP timestamps.
 
         Args:
-            timestamps (list): List of timestamps
+            timestamps (list): List of timestamps (or already converted array)
 
         Returns:
-            tuple: Data for output, total time spent
+            array.array: Array of epoch seconds
         """
-        data = []
-        total = 0
-        if len(timestamps) > 0:
-            # Getting first and last dates
-            first = timestamps[0]["timestamp"]
-            if timestamps[-1]["type"] == "start":
-                timestamps.append({"id": "", "type": "stop", "timestamp": int(time.time())})
-            last = timestamps[-1]["timestamp"]
-            firstYearDate = datetime.datetime.fromtimestamp(first).date().replace(month=1, day=1)
-            lastYearDate = datetime.datetime.fromtimestamp(last).date().replace(month=1, day=1)
-            # Looping through each year
-            currentYearDate = firstYearDate
-            for i in range(lastYearDate.year - firstYearDate.year + 1):
-                # Getting next year
-                nextYearDate = currentYearDate.replace(year=currentYearDate.year+1)
-                # Calculating time in years
-                currentYearEndDate = nextYearDate - datetime.timedelta(days=1)
-                timestampsBetweenDates = cls.getTimestampsBetweenDates(timestamps, currentYearDate, currentYearEndDate)
-                termsData, termsResult = cls.calculateTerms(timestampsBetweenDates)
-                if termsResult["time"] > 0:
-                    total += termsResult["time"]
-                    data.append({"id": len(data) +1, "year": currentYearDate, "time": termsResult["time"]})
-                # Switching to next year
-                currentYearDate = nextYearDate
-        return data, {"id": "SUM", "year": "", "time": total}
\ No newline at end of file
+        if cls.isEpochs(timestamps):
+            return timestamps
+        return cls.getEpochs(timestamps)
+
+
+    def fromEpochs(cls, epochs, offset: int = 0) -> list:
+        """Converts compact representation (array of epoch seconds) to list of timestamps
+
+        Args:
+            epochs (array.array): Array of epoch seconds
+            offset (int, optional): Index of the first timestamp. Defaults to 0.
+
+        Returns:
+            list: List of timestamps
+        """
+        return list(cls.iterateTimestamps(epochs, offset))
+
+
+    def iterateTimestamps(cls, epochs, offset: int = 0):
+        """Iterates through timestamps created from compact representation (array of epoch seconds) one by one
+
+        Args:
+            epochs (array.array): Array of epoch seconds
+            offset (int, optional): Index of the first timestamp. Defaults to 0.
+
+        Yields:
+            dict: Timestamp
+        """
+        types = ("start", "stop")
+        for i, epoch in enumerate(epochs, offset):
+            yield {"id": i + 1, "type": types[i % 2], "timestamp": epoch}
+
+
+    def cacheSnapshot(cls, epochs: array.array, timestamps: tuple = None) -> array.array:
+        """Keeps timestamps in memory until the timestamps file changes
+
+        Args:
+            epochs (array.array): Epoch seconds of timestamps which are currently saved in the file
+            timestamps (tuple, optional): The same timestamps as dicts. Defaults to None (created when needed).
+
+        Returns:
+            array.array: Cached epoch seconds
+        """
+        cls.snapshot = epochs
+        cls.snapshotTimestamps = timestamps
+        cls.snapshotKey = cls.getFileKey()
+        return epochs
+
+
+    def loadEpochs(cls) -> array.array:
+        """Attempts to load timestamps in compact representation (array of epoch seconds)
+        File is only read when it changed since the last load. Returned array must not be modified.
+
+        Returns:
+            array.array: Epoch seconds
+        """
+        if not cls.folderExists():
+            cls.createFolder()
+        cls.migrateToJournal()
+        if cls.fileExists():
+            key = cls.getFileKey()
+            if key is not None and key == getattr(cls, "snapshotKey", None):
+                return cls.snapshot
+            epochs = cls.getStorage().readEpochs()
+            segments = cls.loadSegments()
+            if len(segments) > 0:
+                archived = array.array("q")
+                for segment in segments:
+                    archived.extend(cls.loadSegmentEpochs(segment))
+                archived.extend(epochs)
+                epochs = archived
+            return cls.cacheSnapshot(epochs)
+        elif cls.readOnly:
+            return array.array("q")
+        else:
+            cls.saveTimestamps([])
+            return cls.snapshot
+
+
+    def loadTail(cls, count: int = None, firstDate: datetime.date = None) -> tuple:
+        """Attempts to load only timestamps at the end of the history (reading the file from its end)
+        Term crossing the first date is included as a whole, so the tail starts with a START timestamp.
+        Archived segments are only read when the tail reaches into them.
+
+        Args:
+            count (int, optional): Maximal number of timestamps. Defaults to None (no limit).
+            firstDate (datetime.date, optional): First date. Defaults to None (no limit).
+
+        Returns:
+            tuple: Index of the first timestamp, epoch seconds of timestamps from that index
+        """
+        since = None if firstDate is None else cls.getMidnight(firstDate.toordinal())
+        if not cls.folderExists():
+            cls.createFolder()
+        cls.migrateToJournal()
+        key = cls.getFileKey()
+        if key is not None and key == getattr(cls, "snapshotKey", None):
+            offset = Storage.getTailOffset(cls.snapshot, count, since)
+            return offset, cls.snapshot[offset:]
+        offset, epochs = cls.getStorage().readTail(count, since)
+        segments = cls.loadSegments()
+        position = len(segments)
+        while position > 0:
+            segment = segments[position - 1]
+            if offset != segment["offset"] + segment["count"] or (count is not None and len(epochs) >= count):
+                break
+            if since is not None and (segment["last"] < since or (len(epochs) > 0 and epochs[0] < since)):
+                break
+            joined = array.array("q", cls.loadSegmentEpochs(segment))
+            joined.extend(epochs)
+            first = Storage.getTailOffset(joined, count, since)
+            offset, epochs = segment["offset"] + first, joined[first:]
+            position -= 1
+        return offset, epochs
+
+
+    def loadSnapshot(cls) -> tuple:
+        """Attempts to load timestamps as an immutable snapshot
+        File is only read when it changed since the last load. Timestamps in the snapshot must not be modified.
+
+        Returns:
+            tuple: Timestamps
+        """
+        epochs = cls.loadEpochs()
+        if cls.snapshotTimestamps is None:
+            cls.snapshotTimestamps = tuple(cls.fromEpochs(epochs))
+        return cls.snapshotTimestamps
+
+
+    def loadTimestamps(cls) -> list:
+        """Attempts to load list of timestamps
+        Returned list is a copy of the cached snapshot, so it can be modified.
+
+        Returns:
+            list: List of timestamps
+        """
+        return list(cls.loadSnapshot())
+
+
+    def saveTimestamps(cls, timestamps: list) -> bool:
+        """Attempts to save list of timestamps
+        Archived segments which still match the first timestamps are kept, the rest is saved into the timestamps file.
+
+        Args:
+            timestamps (list): List of timestamps to save
+
+        Returns:
+            bool: Success?
+        """
+        if not cls.folderExists():
+            cls.createFolder()
+        cls.deleteRollup()
+        archived = 0
+        for segment in cls.loadSegments():
+            end = segment["offset"] + segment["count"]
+            if end > len(timestamps) or timestamps[segment["offset"]]["timestamp"] != segment["first"] or timestamps[end - 1]["timestamp"] != segment["last"]:
+                break
+            archived = end
+        cls.deleteSegments(archived)
+        cls.getStorage().write(timestamps[archived:])
+        cls.cacheSnapshot(array.array("q", (timestamp["timestamp"] for timestamp in timestamps)), tuple(timestamps))
+        return True
+
+
+    def loadLastTimestamp(cls) -> dict:
+        """Attempts to load only the last timestamp
+
+        Returns:
+            dict: Last timestamp or None if there are no timestamps
+        """
+        if not cls.folderExists():
+            cls.createFolder()
+        cls.migrateToJournal()
+        if getattr(cls, "snapshotKey", None) is None or cls.snapshotKey != cls.getFileKey():
+            last = cls.getStorage().readLast()
+            segments = cls.loadSegments()
+            if last is None and len(segments) > 0:
+                # Timestamps file is empty right after compaction, archived segments end with a STOP timestamp
+                last = {"id": segments[-1]["offset"] + segments[-1]["count"], "type": "stop", "timestamp": segments[-1]["last"]}
+            return last
+        epochs = cls.loadEpochs()
+        if len(epochs) == 0:
+            return None
+        return {"id": len(epochs), "type": ("start", "stop")[(len(epochs) - 1) % 2], "timestamp": epochs[-1]}
+
+
+    def addTimestamp(cls, type: str) -> bool:
+        """Attempts to add a new timestamp of specified type
+        Only the last timestamp is read to check that timestamp types alternate.
+
+        Args:
+            type (str): Timestamp type ("start" or "stop")
+
+        Returns:
+            bool: Success?
+        """
+        # Last timestamp has to be read while holding the lock, so that concurrent punches can't both pass the check
+        with cls.lock():
+            last = cls.loadLastTimestamp()
+            lastType = "stop" if last is None else last["type"]
+            if lastType == type:
+                return False
+            timestamp = {"id": 1 if last is None else last["id"] + 1, "type": type, "timestamp": int(time.time())}
+            cached = getattr(cls, "snapshotKey", None) is not None and cls.snapshotKey == cls.getFileKey()
+            cls.getStorage().append(timestamp)
+            # Memory-mapped timestamps are mapped again when they are needed
+            if cached and isinstance(cls.snapshot, array.array):
+                cls.cacheSnapshot(cls.snapshot + array.array("q", [timestamp["timestamp"]]))
+            if type == "stop":
+                cls.updateRollup(last["timestamp"], timestamp["timestamp"], timestamp["id"])
+            return True
+
+
+    def mergeTerms(cls, terms: list, rejected: list) -> int:
+        """Adds closed terms to saved timestamps (all of them are saved at once)
+        Terms overlapping saved terms or each other are rejected, saved timestamps are never changed.
+
+        Args:
+            terms (list): Terms (start, stop and row number of the source) in any order
+            rejected (list): List for row numbers and reasons of rejected terms
+
+        Returns:
+            int: Number of added terms
+        """
+        with cls.lock():
+            epochs = cls.loadEpochs()
+            accepted = []
+            lastStop = None
+            for start, stop, row in sorted(terms):
+                if stop < start:
+                    rejected.append((row, "STOP before START"))
+                    continue
+                # Index of the first saved timestamp after the start, odd index means the start is inside a saved term
+                i = bisect.bisect_right(epochs, start)
+                if i % 2 == 1 or (i < len(epochs) and epochs[i] < stop):
+                    rejected.append((row, "overlaps saved term"))
+                elif lastStop is not None and start < lastStop:
+                    rejected.append((row, "overlaps imported term"))
+                else:
+                    accepted.append((start, stop))
+                    lastStop = stop
+            if len(accepted) == 0:
+                return 0
+            closed = len(epochs) - len(epochs) % 2
+            saved = zip(epochs[0:closed:2], epochs[1:closed:2])
+            merged = array.array("q")
+            for start, stop in sorted(itertools.chain(saved, accepted)):
+                merged.append(start)
+                merged.append(stop)
+            # Unclosed term is the last one, imported terms can't overlap it
+            merged.extend(epochs[closed:])
+            cls.saveTimestamps(cls.fromEpochs(merged))
+        return len(accepted)
+
+
+    def eraseTimestamp(cls) -> bool:
+        """Attempts to remove the last timestamp
+
+        Returns:
+            bool: Success? (False if there are no timestamps)
+        """
+        with cls.lock():
+            timestamps = cls.loadTimestamps()
+            if len(timestamps) == 0:
+                return False
+            timestamps.pop()
+            return cls.saveTimestamps(timestamps)
+    
+
+    #########################################################################################
+
+
+    def startTimestamp(cls) -> bool:
+        """Attempts to add a start timestamp
+
+        Returns:
+            bool: Success?
+        """
+        return cls.addTimestamp("start")
+
+
+    def stopTimestamp(cls) -> bool:
+        """Attempts to add a stop timestamp
+
+        Returns:
+            bool: Success?
+        """
+        return cls.addTimestamp("stop")
+    
+
+    #########################################################################################
+
+
+    def getRollupPath(cls) -> str:
+        """Returns path to file with time spent for each day
+
+        Returns:
+            str: Absolute file path
+        """
+        return os.path.join(cls.getFolderPath(), cls.rollupName)
+
+
+    def loadRollup(cls) -> dict:
+        """Attempts to load time spent for each day
+
+        Returns:
+            dict: Number of timestamps included ("count") and time for each day ("days"), None if there is no file
+        """
+        import json
+        if not os.path.isfile(cls.getRollupPath()):
+            return None
+        with Profiler().measure("read"), open(cls.getRollupPath(), "r") as file:
+            rollup = json.load(file)
+            Profiler().count("bytes read", file.tell())
+        return rollup
+
+
+    def saveRollup(cls, rollup: dict) -> bool:
+        """Attempts to save time spent for each day
+        Rollup which can't be saved (for example in a read-only folder) is only used in memory.
+
+        Args:
+            rollup (dict): Number of timestamps included and time for each day
+
+        Returns:
+            bool: Success?
+        """
+        import json
+        cls.daysKey = None
+        if cls.readOnly:
+            return False
+        try:
+            if not cls.folderExists():
+                cls.createFolder()
+            with Profiler().measure("write"):
+                Storage.replaceFile(cls.getRollupPath(), lambda file: json.dump(rollup, file, sort_keys=True))
+        except OSError:
+            return False
+        return True
+
+
+    def deleteRollup(cls) -> bool:
+        """Removes file with time spent for each day, it will be rebuilt when needed
+
+        Returns:
+            bool: Success?
+        """
+        cls.daysKey = None
+        if os.path.isfile(cls.getRollupPath()):
+            os.remove(cls.getRollupPath())
+            return True
+        return False
+
+
+    def rebuildRollup(cls, timestamps: list = None) -> dict:
+        """Calculates time spent for each day from closed terms and saves it
+        Without timestamps the storage calculates it when it can, otherwise all saved timestamps are loaded.
+        Archived segments contribute their saved time for each day, their timestamps are not read.
+
+        Args:
+            timestamps (list, optional): List of timestamps (or array of epoch seconds). Defaults to None (saved timestamps).
+
+        Returns:
+            dict: Number of timestamps included and time for each day
+        """
+        if timestamps is None:
+            last = cls.loadLastTimestamp()
+            count = 0 if last is None else last["id"] - last["id"] % 2
+            storage = cls.getStorage()
+            days = storage.readDays(count, lambda terms: cls.splitTerms(terms, cls.getDayBucket))
+            if days is None and storage.offset > 0:
+                days = {firstDate.isoformat(): delta for firstDate, lastDate, delta in cls.calculateBuckets(storage.readEpochs()[:count - storage.offset], cls.getDayBucket)}
+            if days is not None:
+                for segment in cls.loadSegments():
+                    for day, delta in cls.loadSegmentDays(segment).items():
+                        days[day] = days.get(day, 0) + delta
+                rollup = {"count": count, "days": days}
+                cls.saveRollup(rollup)
+                return rollup
+            timestamps = cls.loadEpochs()
+        count = len(timestamps) - len(timestamps) % 2
+        days = cls.calculateBuckets(timestamps[:count], cls.getDayBucket)
+        rollup = {"count": count, "days": {firstDate.isoformat(): delta for firstDate, lastDate, delta in days}}
+        cls.saveRollup(rollup)
+        return rollup
+
+
+    def updateRollup(cls, start: int, stop: int, count: int):
+        """Adds a closed term to time spent for each day
+        Missing rollup is left to be built when it is needed, rollup not ending right before the term is rebuilt from all timestamps.
+
+        Args:
+            start (int): Term start
+            stop (int): Term stop
+            count (int): Number of timestamps including the term
+        """
+        rollup = cls.loadRollup()
+        if rollup is None:
+            return
+        if rollup["count"] != count - 2:
+            cls.rebuildRollup()
+            return
+        for firstDate, lastDate, delta in cls.splitTerms([(start, stop)], cls.getDayBucket):
+            key = firstDate.isoformat()
+            rollup["days"][key] = rollup["days"].get(key, 0) + delta
+        rollup["count"] = count
+        cls.saveRollup(rollup)
+
+
+    def loadClosedDays(cls, last: dict) -> list:
+        """Loads time spent for each day of closed terms
+        Rollup is only read when the timestamps file changed since the last load, so that reports of a single invocation share it.
+
+        Args:
+            last (dict): Last timestamp
+
+        Returns:
+            list: List of day buckets [first date, last date, time spent] in chronological order, must not be modified
+        """
+        key = cls.getFileKey()
+        if key is not None and key == getattr(cls, "daysKey", None):
+            return cls.closedDays
+        count = last["id"] if last["type"] == "stop" else last["id"] - 1
+        rollup = cls.loadRollup()
+        if rollup is None or rollup["count"] != count:
+            rollup = cls.rebuildRollup()
+        cls.closedDays = []
+        for day in sorted(rollup["days"].keys()):
+            if rollup["days"][day] > 0:
+                date = datetime.date.fromisoformat(day)
+                cls.closedDays.append([date, date, rollup["days"][day]])
+        cls.daysKey = key
+        return cls.closedDays
+
+
+    def loadDays(cls) -> list:
+        """Loads time spent for each day of saved timestamps
+        Closed terms are read from the rollup file, unclosed term uses current time as its end.
+
+        Returns:
+            list: List of day buckets [first date, last date, time spent] in chronological order
+        """
+        last = cls.loadLastTimestamp()
+        if last is None:
+            return []
+        buckets = list(cls.loadClosedDays(last))
+        if last["type"] == "start":
+            # Days of the unclosed term can only follow the last closed day
+            for firstDate, lastDate, delta in cls.splitTerms([(last["timestamp"], int(time.time()))], cls.getDayBucket):
+                if len(buckets) > 0 and buckets[-1][0] == firstDate:
+                    buckets[-1] = [firstDate, lastDate, buckets[-1][2] + delta]
+                elif delta > 0:
+                    buckets.append([firstDate, lastDate, delta])
+        return buckets
+    
+
+    #########################################################################################
+
+
+    def updateIndex(cls, timestamps):
+        """Builds index of timestamps (epoch seconds and cumulative worked time for each timestamp)
+        Index is kept for the last used timestamps and only extended when new timestamps are appended.
+
+        Args:
+            timestamps (list): List of timestamps (or array of epoch seconds)
+        """
+        if cls.isEpochs(timestamps):
+            # Array of epoch seconds is used directly
+            if getattr(cls, "epochs", None) is not timestamps or len(cls.worked) > len(timestamps):
+                cls.epochs = timestamps
+                cls.worked = array.array("q")
+                cls.indexedTimestamp = None
+        else:
+            # Index can be reused when the list starts with the same (shared) timestamps
+            epochs = getattr(cls, "epochs", None)
+            if epochs is None or getattr(cls, "indexedTimestamp", None) is None or len(epochs) > len(timestamps) \
+                    or timestamps[len(epochs) - 1] is not cls.indexedTimestamp:
+                cls.epochs = epochs = array.array("q")
+                cls.worked = array.array("q")
+            epochs.extend(timestamps[i]["timestamp"] for i in range(len(epochs), len(timestamps)))
+            cls.indexedTimestamp = timestamps[-1] if len(timestamps) > 0 else None
+        epochs = cls.epochs
+        worked = cls.worked
+        Profiler().count("records indexed", len(epochs) - len(worked))
+        for i in range(len(worked), len(epochs)):
+            # Time worked until a START timestamp doesn't change, STOP timestamp adds a whole term
+            if i % 2 == 0:
+                worked.append(worked[-1] if i > 0 else 0)
+            else:
+                worked.append(worked[-1] + epochs[i] - epochs[i - 1])
+
+
+    def getEpochs(cls, timestamps) -> array.array:
+        """Returns array of timestamp times (epoch seconds) aligned with list of timestamps
+
+        Args:
+            timestamps (list): List of timestamps (or array of epoch seconds)
+
+        Returns:
+            array.array: Array of epoch seconds
+        """
+        cls.updateIndex(timestamps)
+        return cls.epochs
+
+
+    def getWorked(cls, timestamps: list, epoch: int) -> int:
+        """Returns total time worked from the first timestamp until the specified time
+        Unclosed last term uses current time as its end.
+
+        Args:
+            timestamps (list): List of timestamps
+            epoch (int): Time in epoch seconds
+
+        Returns:
+            int: Time worked in seconds
+        """
+        epochs = cls.getEpochs(timestamps)
+        i = bisect.bisect_right(epochs, epoch) - 1
+        if i < 0:
+            return 0
+        worked = cls.worked[i]
+        # Adding part of a term which has started before the specified time
+        if i % 2 == 0:
+            stop = epochs[i + 1] if i + 1 < len(epochs) else int(time.time())
+            worked += max(0, min(epoch, stop) - epochs[i])
+        return worked
+
+
+    def getTimestampsBetweenDates(cls, timestamps: list, firstDate: datetime.date, lastDate: datetime.date = None) -> list:
+        """Attempts to get list of timestamps between two dates
+        Timestamps are located by binary search, list of timestamps has to be in chronological order.
+
+        Args:
+            timestamps (list): List of timestamps
+            firstDate (datetime.date): First date
+            lastDate (datetime.date, optional): Last date. Defaults to None.
+
+        Returns:
+            list: Found timestamps between dates
+        """
+        Profiler().count("getTimestampsBetweenDates calls")
+        if lastDate is None:
+            lastDate = firstDate
+        firstDateTimestamp = cls.getMidnight(firstDate.toordinal())
+        lastDateTimestamp = cls.getMidnight(lastDate.toordinal() + 1)
+        # Getting timestamps between dates
+        epochs = cls.getEpochs(timestamps)
+        first = bisect.bisect_left(epochs, firstDateTimestamp)
+        last = bisect.bisect_right(epochs, lastDateTimestamp)
+        timestampsBetweenDates = timestamps[first:last]
+        beforeTimestamp = timestamps[first - 1] if first > 0 else None
+        # Adding additional timestamps
+        if beforeTimestamp is not None and beforeTimestamp["type"] == "start":
+            if len(timestampsBetweenDates) == 0 or timestampsBetweenDates[0]["type"] == "stop":
+                timestampsBetweenDates.insert(0, {"id": "", "type": "start", "timestamp": firstDateTimestamp})
+        if len(timestampsBetweenDates) > 0 and timestampsBetweenDates[-1]["type"] == "start":
+            stop = max(timestampsBetweenDates[-1]["timestamp"], min(int(time.time()), lastDateTimestamp))
+            timestampsBetweenDates.append({"id": "", "type": "stop", "timestamp": stop})
+        return timestampsBetweenDates
+
+
+    def totalBetween(cls, timestamps: list, firstDate: datetime.date, lastDate: datetime.date = None) -> int:
+        """Calculates total time spent between two dates (both included)
+        Uses cumulative worked time, so only two binary searches are needed.
+
+        Args:
+            timestamps (list): List of timestamps
+            firstDate (datetime.date): First date
+            lastDate (datetime.date, optional): Last date. Defaults to None.
+
+        Returns:
+            int: Time spent in seconds
+        """
+        if lastDate is None:
+            lastDate = firstDate
+        firstDateTimestamp = cls.getMidnight(firstDate.toordinal())
+        lastDateTimestamp = cls.getMidnight(lastDate.toordinal() + 1)
+        return cls.getWorked(timestamps, lastDateTimestamp) - cls.getWorked(timestamps, firstDateTimestamp)
+    
+
+    #########################################################################################
+
+
+    def extendMidnights(cls, date: datetime.date):
+        """Extends table of local midnights, so that it contains whole years around a date
+        Midnights are converted by datetime once, so days shortened or extended by DST changes have their real length.
+        Table is shared by all timers.
+
+        Args:
+            date (datetime.date): Date which has to be in the table
+        """
+        first = date.replace(month=1, day=1).toordinal()
+        last = date.replace(month=12, day=31).toordinal() + 1
+        convert = lambda ordinal: int(datetime.datetime.combine(datetime.date.fromordinal(ordinal), datetime.time.min).timestamp())
+        if len(getattr(cls, "midnights", ())) == 0:
+            Timer.midnightsOrdinal = first
+            Timer.midnights = array.array("q", map(convert, range(first, last + 1)))
+            return
+        tableFirst = cls.midnightsOrdinal
+        tableEnd = tableFirst + len(cls.midnights)
+        if first < tableFirst:
+            Timer.midnights = array.array("q", map(convert, range(first, tableFirst))) + cls.midnights
+            Timer.midnightsOrdinal = first
+        if last >= tableEnd:
+            cls.midnights.extend(map(convert, range(tableEnd, last + 1)))
+
+
+    def getMidnight(cls, ordinal: int) -> int:
+        """Returns local midnight (start) of a day from the table of midnights
+
+        Args:
+            ordinal (int): Proleptic Gregorian ordinal of the day
+
+        Returns:
+            int: Epoch seconds
+        """
+        index = ordinal - getattr(cls, "midnightsOrdinal", ordinal)
+        if not 0 <= index < len(getattr(cls, "midnights", ())):
+            cls.extendMidnights(datetime.date.fromordinal(ordinal))
+            index = ordinal - cls.midnightsOrdinal
+        return cls.midnights[index]
+
+
+    def getDayOrdinal(cls, epoch: int) -> int:
+        """Returns local day containing a time (binary search in the table of midnights)
+
+        Args:
+            epoch (int): Epoch seconds
+
+        Returns:
+            int: Proleptic Gregorian ordinal of the day
+        """
+        midnights = getattr(cls, "midnights", ())
+        index = bisect.bisect_right(midnights, epoch) - 1
+        if not 0 <= index < len(midnights) - 1:
+            cls.extendMidnights(datetime.datetime.fromtimestamp(epoch).date())
+            midnights = cls.midnights
+            index = bisect.bisect_right(midnights, epoch) - 1
+        return cls.midnightsOrdinal + index
+
+
+    def iterateTerms(cls, timestamps):
+        """Iterates through terms (pairs of START and STOP timestamps)
+        List of timestamps should start with a START timestamp.
+        Unclosed last term uses current time as its end.
+
+        Args:
+            timestamps (list): List of timestamps (or array of epoch seconds)
+
+        Yields:
+            tuple: Start and stop time of a term
+        """
+        epochs = cls.toEpochs(timestamps)
+        count = len(epochs)
+        for i in range(0, count - 1, 2):
+            yield epochs[i], epochs[i + 1]
+        if count % 2 == 1:
+            yield epochs[-1], int(time.time())
+
+
+    def iterateBuckets(cls, terms, getBucket):
+        """Iterates through time spent in calendar buckets (days, weeks, ...) in a single pass through terms
+        Each term is split at bucket boundaries (local midnights), buckets without any time spent are skipped.
+
+        Args:
+            terms (iterable): Terms (start and stop time) in chronological order
+            getBucket (callable): Returns first and last date of a bucket containing the specified date
+
+        Yields:
+            list: Bucket [first date, last date, time spent], buckets are in chronological order
+        """
+        bucket = None
+        bucketEnd = None
+        visited = 0
+        for start, stop in terms:
+            while start < stop:
+                # Switching to a bucket containing term start
+                if bucketEnd is None or start >= bucketEnd:
+                    if bucket is not None and bucket[2] > 0:
+                        yield bucket
+                    firstDate, lastDate = getBucket(datetime.date.fromordinal(cls.getDayOrdinal(start)))
+                    bucketEnd = cls.getMidnight(lastDate.toordinal() + 1)
+                    bucket = [firstDate, lastDate, 0]
+                    visited += 1
+                # Adding part of the term which belongs to current bucket
+                end = min(stop, bucketEnd)
+                bucket[2] += end - start
+                start = end
+        if bucket is not None and bucket[2] > 0:
+            yield bucket
+        Profiler().count("buckets visited", visited)
+
+
+    def splitTerms(cls, terms, getBucket) -> list:
+        """Calculates time spent in calendar buckets (days, weeks, ...) in a single pass through terms
+
+        Args:
+            terms (iterable): Terms (start and stop time) in chronological order
+            getBucket (callable): Returns first and last date of a bucket containing the specified date
+
+        Returns:
+            list: List of buckets [first date, last date, time spent] in chronological order
+        """
+        return list(cls.iterateBuckets(terms, getBucket))
+
+
+    def calculateBuckets(cls, timestamps: list, getBucket) -> list:
+        """Calculates time spent in calendar buckets (days, weeks, ...)
+        List of timestamps should start with a START timestamp.
+
+        Args:
+            timestamps (list): List of timestamps
+            getBucket (callable): Returns first and last date of a bucket containing the specified date
+
+        Returns:
+            list: List of buckets [first date, last date, time spent] in chronological order
+        """
+        # Each process calculates its part with NumPy when it is installed
+        if cls.jobs > 1 and hasattr(cls, getattr(getBucket, "__name__", "")):
+            return cls.calculateBucketsInParallel(cls.toEpochs(timestamps), getBucket.__name__)
+        if cls.getNumpy() is not None:
+            return cls.splitTermArrays(*cls.getTermArrays(timestamps), getBucket)
+        return cls.splitTerms(cls.iterateTerms(timestamps), getBucket)
+
+
+    def getNumpy(cls):
+        """Returns NumPy module when it is installed and vectorized calculations are enabled
+        Module is imported only when it is needed (importing it is slow).
+
+        Returns:
+            module: NumPy module or None
+        """
+        if not cls.vectorize:
+            return None
+        if not hasattr(cls, "numpy"):
+            try:
+                import numpy
+            except ImportError:
+                numpy = None
+            cls.numpy = numpy
+        return cls.numpy
+
+
+    def getTermArrays(cls, timestamps) -> tuple:
+        """Converts timestamps to NumPy arrays of term starts and stops
+        Unclosed last term uses current time as its end.
+
+        Args:
+            timestamps (list): List of timestamps (or array of epoch seconds)
+
+        Returns:
+            tuple: Array of starts, array of stops (int64)
+        """
+        numpy = cls.getNumpy()
+        epochs = numpy.asarray(cls.toEpochs(timestamps), dtype=numpy.int64)
+        starts = epochs[0::2]
+        stops = epochs[1::2]
+        if len(starts) > len(stops):
+            stops = numpy.append(stops, numpy.int64(int(time.time())))
+        return starts, stops
+
+
+    def splitTermArrays(cls, starts, stops, getBucket) -> list:
+        """Calculates time spent in calendar buckets from NumPy arrays of term starts and stops
+        Time worked until each bucket boundary is found by binary search, bucket totals are differences between boundaries.
+
+        Args:
+            starts: Array of term starts in chronological order
+            stops: Array of term stops
+            getBucket (callable): Returns first and last date of a bucket containing the specified date
+
+        Returns:
+            list: List of buckets [first date, last date, time spent] in chronological order
+        """
+        numpy = cls.getNumpy()
+        if len(starts) == 0:
+            return []
+        # Boundaries (local midnights) of all buckets from the first start to the last stop
+        buckets = []
+        edges = []
+        firstDate, lastDate = getBucket(datetime.date.fromordinal(cls.getDayOrdinal(int(starts[0]))))
+        edges.append(cls.getMidnight(firstDate.toordinal()))
+        end = int(stops.max())
+        while True:
+            buckets.append((firstDate, lastDate))
+            nextDate = lastDate + datetime.timedelta(days=1)
+            edges.append(cls.getMidnight(nextDate.toordinal()))
+            if edges[-1] >= end:
+                break
+            firstDate, lastDate = getBucket(nextDate)
+        edges = numpy.array(edges, dtype=numpy.int64)
+        # Time worked until each boundary: whole terms started before it minus the part of the last one after it
+        worked = numpy.concatenate(([0], numpy.cumsum(stops - starts)))
+        started = numpy.searchsorted(starts, edges, side="left")
+        overflow = numpy.where(started > 0, numpy.maximum(stops[numpy.maximum(started - 1, 0)] - edges, 0), 0)
+        totals = numpy.diff(worked[started] - overflow).tolist()
+        Profiler().count("buckets visited", len(buckets))
+        return [[firstDate, lastDate, total] for (firstDate, lastDate), total in zip(buckets, totals) if total > 0]
+
+
+    def partitionEpochs(cls, epochs) -> list:
+        """Splits timestamps into parts containing whole terms (by years or by chunk size)
+        Term crossing a boundary belongs to the part containing its START timestamp.
+
+        Args:
+            epochs (array.array): Epoch seconds
+
+        Returns:
+            list: List of (first index, last index + 1) of each part
+        """
+        if cls.chunkSize is not None:
+            size = max(2, cls.chunkSize - cls.chunkSize % 2)
+            bounds = list(range(size, len(epochs), size))
+        else:
+            bounds = []
+            if len(epochs) > 0:
+                for year in range(datetime.datetime.fromtimestamp(epochs[0]).year + 1, datetime.datetime.fromtimestamp(epochs[-1]).year + 1):
+                    first = bisect.bisect_left(epochs, int(datetime.datetime(year, 1, 1).timestamp()))
+                    bounds.append(first - first % 2)
+        bounds = [0] + [bound for bound in bounds if 0 < bound < len(epochs)] + [len(epochs)]
+        return [(first, last) for first, last in zip(bounds, bounds[1:]) if first < last]
+
+
+    def calculateBucketsInParallel(cls, epochs, bucketName: str) -> list:
+        """Calculates time spent in calendar buckets in multiple processes (one part of timestamps in each)
+        Buckets split between two parts are merged, so the result matches calculation in a single process.
+
+        Args:
+            epochs (array.array): Epoch seconds
+            bucketName (str): Name of the method returning first and last date of a bucket
+
+        Returns:
+            list: List of buckets [first date, last date, time spent] in chronological order
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        epochs = array.array("q", epochs)
+        # Unclosed term ends at the same time in all processes
+        if len(epochs) % 2 == 1:
+            epochs.append(max(epochs[-1], int(time.time())))
+        parts = cls.partitionEpochs(epochs)
+        if len(parts) < 2:
+            return calculatePart(epochs, bucketName)
+        with ProcessPoolExecutor(min(cls.jobs, len(parts))) as executor:
+            results = executor.map(calculatePart, [epochs[first:last] for first, last in parts], [bucketName] * len(parts))
+            buckets = []
+            for result in results:
+                for bucket in result:
+                    if len(buckets) > 0 and buckets[-1][0] == bucket[0]:
+                        buckets[-1][2] += bucket[2]
+                    else:
+                        buckets.append(bucket)
+        Profiler().count("parts calculated", len(parts))
+        return buckets
+
+
+    def iterateGroups(cls, buckets, getBucket):
+        """Iterates through smaller buckets (usually days) grouped into bigger ones (weeks, months, years)
+
+        Args:
+            buckets (iterable): Buckets in chronological order
+            getBucket (callable): Returns first and last date of a bucket containing the specified date
+
+        Yields:
+            list: Bucket [first date, last date, time spent], buckets are in chronological order
+        """
+        group = None
+        visited = 0
+        for firstDate, lastDate, delta in buckets:
+            if group is None or firstDate > group[1]:
+                if group is not None:
+                    yield group
+                group = list(getBucket(firstDate)) + [0]
+            group[2] += delta
+            visited += 1
+        if group is not None:
+            yield group
+        Profiler().count("buckets visited", visited)
+
+
+    def groupBuckets(cls, buckets: list, getBucket) -> list:
+        """Groups smaller buckets (usually days) into bigger ones (weeks, months, years)
+
+        Args:
+            buckets (list): List of buckets in chronological order
+            getBucket (callable): Returns first and last date of a bucket containing the specified date
+
+        Returns:
+            list: List of buckets [first date, last date, time spent] in chronological order
+        """
+        return list(cls.iterateGroups(buckets, getBucket))
+
+
+    def loadFolderDays(cls, folderNames: list) -> list:
+        """Loads time spent for each day of timestamps in several folders
+        Folders are only read, time for each day is calculated in memory when their rollup is missing or outdated.
+
+        Args:
+            folderNames (list): Folder names (or paths)
+
+        Returns:
+            list: List of day buckets for each folder
+        """
+        sources = []
+        for folderName in folderNames:
+            with cls.useFolder(folderName, True):
+                sources.append(cls.loadDays())
+        return sources
+
+
+    def iterateSourceBuckets(cls, buckets, index: int):
+        """Iterates through buckets of a single source, marking them with the source index
+
+        Args:
+            buckets (iterable): Buckets in chronological order
+            index (int): Source index
+
+        Yields:
+            tuple: First date, source index, time spent
+        """
+        for firstDate, lastDate, delta in buckets:
+            yield firstDate, index, delta
+
+
+    def iterateMergedBuckets(cls, sources: list, getBucket):
+        """Merges buckets of several sources (heap-based merge of sorted buckets) and groups them into bigger buckets
+
+        Args:
+            sources (list): Buckets (usually days) of each source in chronological order
+            getBucket (callable): Returns first and last date of a bucket containing the specified date
+
+        Yields:
+            list: Bucket [first date, last date, list of time spent for each source], buckets are in chronological order
+        """
+        group = None
+        for firstDate, index, delta in heapq.merge(*(cls.iterateSourceBuckets(buckets, index) for index, buckets in enumerate(sources))):
+            if group is None or firstDate > group[1]:
+                if group is not None:
+                    yield group
+                group = list(getBucket(firstDate)) + [[0] * len(sources)]
+            group[2][index] += delta
+        if group is not None:
+            yield group
+
+
+    def getDayBucket(cls, date: datetime.date) -> tuple:
+        """Returns first and last date of a day
+
+        Args:
+            date (datetime.date): Date inside the bucket
+
+        Returns:
+            tuple: First and last date
+        """
+        return date, date
+
+
+    def getWeekBucket(cls, date: datetime.date) -> tuple:
+        """Returns first and last date of a week (monday and sunday)
+
+        Args:
+            date (datetime.date): Date inside the bucket
+
+        Returns:
+            tuple: First and last date
+        """
+        monday = date - datetime.timedelta(days=date.weekday())
+        return monday, monday + datetime.timedelta(days=6)
+
+
+    def getMonthBucket(cls, date: datetime.date) -> tuple:
+        """Returns first and last date of a month
+
+        Args:
+            date (datetime.date): Date inside the bucket
+
+        Returns:
+            tuple: First and last date
+        """
+        import calendar
+        return date.replace(day=1), date.replace(day=calendar.monthrange(date.year, date.month)[1])
+
+
+    def getYearBucket(cls, date: datetime.date) -> tuple:
+        """Returns first and last date of a year
+
+        Args:
+            date (datetime.date): Date inside the bucket
+
+        Returns:
+            tuple: First and last date
+        """
+        return date.replace(month=1, day=1), date.replace(month=12, day=31)
+    
+
+    #########################################################################################
+
+
+    def calculateTerms(cls, timestamps: list) -> tuple:
+        """Calculates time spent between timestamps
+        List of timestamps should start with a START timestamp.
+
+        Args:
+            timestamps (list): List of timestamps
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        numpy = cls.getNumpy()
+        if numpy is not None:
+            starts, stops = cls.getTermArrays(timestamps)
+            deltas = (stops - starts).tolist()
+            data = [{"id": i, "start": start, "stop": stop, "time": delta} for i, (start, stop, delta) in enumerate(zip(starts.tolist(), stops.tolist(), deltas), 1)]
+            return data, {"id": "SUM", "start": "", "stop": "", "time": sum(deltas)}
+        data = list(cls.iterateTermRows(timestamps))
+        return data, {"id": "SUM", "start": "", "stop": "", "time": sum(row["time"] for row in data)}
+
+
+    def iterateTermRows(cls, timestamps):
+        """Iterates through time spent between timestamps (one row for each term)
+        List of timestamps should start with a START timestamp.
+
+        Args:
+            timestamps (list): List of timestamps (or array of epoch seconds)
+
+        Yields:
+            dict: Term number, start, stop and time spent
+        """
+        for i, (start, stop) in enumerate(cls.iterateTerms(timestamps), 1):
+            yield {"id": i, "start": start, "stop": stop, "time": stop - start}
+
+
+    def summarizeDays(cls, days: list) -> tuple:
+        """Creates output for time spent for each day
+
+        Args:
+            days (list): List of day buckets
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        data = []
+        total = 0
+        for firstDate, lastDate, delta in days:
+            total += delta
+            data.append({"id": len(data) +1, "date": firstDate, "time": delta})
+        return data, {"id": "SUM", "date": "", "time": total}
+
+
+    def summarizeWeeks(cls, days: list) -> tuple:
+        """Creates output for time spent for each week
+
+        Args:
+            days (list): List of day buckets
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        data = []
+        total = 0
+        for firstDate, lastDate, delta in cls.groupBuckets(days, cls.getWeekBucket):
+            total += delta
+            data.append({"id": len(data) +1, "monday": firstDate, "sunday": lastDate, "time": delta})
+        return data, {"id": "SUM", "monday": "", "sunday": "", "time": total}
+
+
+    def summarizeMonths(cls, days: list) -> tuple:
+        """Creates output for time spent for each month
+
+        Args:
+            days (list): List of day buckets
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        data = []
+        total = 0
+        for firstDate, lastDate, delta in cls.groupBuckets(days, cls.getMonthBucket):
+            total += delta
+            data.append({"id": len(data) +1, "month": firstDate, "time": delta})
+        return data, {"id": "SUM", "month": "", "time": total}
+
+
+    def summarizeYears(cls, days: list) -> tuple:
+        """Creates output for time spent for each year
+
+        Args:
+            days (list): List of day buckets
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        data = []
+        total = 0
+        for firstDate, lastDate, delta in cls.groupBuckets(days, cls.getYearBucket):
+            total += delta
+            data.append({"id": len(data) +1, "year": firstDate, "time": delta})
+        return data, {"id": "SUM", "year": "", "time": total}
+
+
+    def summarizeSources(cls, sources: list, names: list, report: str) -> tuple:
+        """Creates output for time spent by several sources (one column for each source and a total)
+        Source columns are named "time NAME", so source names never replace other columns.
+
+        Args:
+            sources (list): Day buckets of each source
+            names (list): Source names
+            report (str): "days", "weeks", "months" or "years"
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        getBucket, columns = {
+            "days": (cls.getDayBucket, lambda firstDate, lastDate: {"date": firstDate}),
+            "weeks": (cls.getWeekBucket, lambda firstDate, lastDate: {"monday": firstDate, "sunday": lastDate}),
+            "months": (cls.getMonthBucket, lambda firstDate, lastDate: {"month": firstDate}),
+            "years": (cls.getYearBucket, lambda firstDate, lastDate: {"year": firstDate}),
+        }[report]
+        keys = ["time " + name for name in names]
+        data = []
+        totals = [0] * len(sources)
+        for firstDate, lastDate, deltas in cls.iterateMergedBuckets(sources, getBucket):
+            row = {"id": len(data) + 1}
+            row.update(columns(firstDate, lastDate))
+            for i, key in enumerate(keys):
+                row[key] = deltas[i]
+                totals[i] += deltas[i]
+            row["time"] = sum(deltas)
+            data.append(row)
+        result = {"id": "SUM"}
+        result.update({key: "" for key in columns(None, None)})
+        result.update(zip(keys, totals))
+        result["time"] = sum(totals)
+        return data, result
+    
+
+    #########################################################################################
+
+
+    def summarizeRange(cls, days: list, firstDate: datetime.date, lastDate: datetime.date = None) -> tuple:
+        """Summarizes time spent between two dates (both included) from time spent for each day
+        Days in the range are found by two binary searches, only those are summed.
+
+        Args:
+            days (list): List of day buckets in chronological order
+            firstDate (datetime.date): First date
+            lastDate (datetime.date, optional): Last date. Defaults to None.
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        if lastDate is None:
+            lastDate = firstDate
+        dates = [date for date, lastDay, delta in days]
+        first = bisect.bisect_left(dates, firstDate)
+        last = bisect.bisect_right(dates, lastDate)
+        total = sum(delta for date, lastDay, delta in days[first:last])
+        data = [{"id": 1, "from": firstDate, "to": lastDate, "time": total}, ]
+        return data, {"id": "SUM", "from": "", "to": "", "time": total}
+
+
+    def calculateDays(cls, timestamps: list) -> tuple:
+        """Calculates time spent for each day
+        List of timestamps should start with a START timestamp.
+
+        Args:
+            timestamps (list): List of timestamps
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        return cls.summarizeDays(cls.calculateBuckets(timestamps, cls.getDayBucket))
+
+
+    def calculateToday(cls, timestamps: list) -> tuple:
+        """Calculates time spent on the current day
+        List of timestamps should start with a START timestamp.
+
+        Args:
+            timestamps (list): List of timestamps
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        currentDate = datetime.datetime.fromtimestamp(time.time()).date()
+        total = cls.totalBetween(timestamps, currentDate)
+        data = [{"id": 1, "date": currentDate, "time": total}, ]
+        return data, {"id": "SUM", "date": currentDate, "time": total}
+
+
+    def calculateRange(cls, timestamps: list, firstDate: datetime.date, lastDate: datetime.date = None) -> tuple:
+        """Calculates time spent between two dates (both included)
+
+        Args:
+            timestamps (list): List of timestamps
+            firstDate (datetime.date): First date
+            lastDate (datetime.date, optional): Last date. Defaults to None.
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        if lastDate is None:
+            lastDate = firstDate
+        total = cls.totalBetween(timestamps, firstDate, lastDate)
+        data = [{"id": 1, "from": firstDate, "to": lastDate, "time": total}, ]
+        return data, {"id": "SUM", "from": "", "to": "", "time": total}
+
+
+    def calculateMonths(cls, timestamps: list) -> tuple:
+        """Calculates time spent for each month
+        List of timestamps should start with a START timestamp.
+
+        Args:
+            timestamps (list): List of timestamps
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        return cls.summarizeMonths(cls.calculateBuckets(timestamps, cls.getDayBucket))
+
+
+    def calculateWeeks(cls, timestamps: list) -> tuple:
+        """Calculates time spent for each week
+        List of timestamps should start with a START timestamp.
+
+        Args:
+            timestamps (list): List of timestamps
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        return cls.summarizeWeeks(cls.calculateBuckets(timestamps, cls.getDayBucket))
+
+
+    def calculateYears(cls, timestamps: list) -> tuple:
+        """Calculates time spent for each year
+        List of timestamps should start with a START timestamp.
+
+        Args:
+            timestamps (list): List of timestamps
+
+        Returns:
+            tuple: Data for output, total time spent
+        """
+        return cls.summarizeYears(cls.calculateBuckets(timestamps, cls.getDayBucket))
+
+
+def calculatePart(epochs: array.array, bucketName: str) -> list:
+    """Calculates time spent in calendar buckets of a part of timestamps (run in a worker process)
+    Part is calculated with NumPy when it is installed and vectorized calculations are enabled.
+
+    Args:
+        epochs (array.array): Epoch seconds of whole terms
+        bucketName (str): Name of the method returning first and last date of a bucket
+
+    Returns:
+        list: List of buckets [first date, last date, time spent] in chronological order
+    """
+    timer = Timer()
+    if timer.getNumpy() is not None:
+        return timer.splitTermArrays(*timer.getTermArrays(epochs), getattr(timer, bucketName))
+    return timer.splitTerms(timer.iterateTerms(epochs), getattr(timer, bucketName))